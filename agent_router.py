@@ -241,14 +241,82 @@
 #             return None, f"Unexpected error: {str(e)}"
 
 import re
-import json
+import orjson
 from typing import Dict, List, Tuple, Any, Optional
 import requests
 import logging
+from groq_client import groq_session, GROQ_TIMEOUT, CODE_FENCE_RE, api_key_hash, is_groq_key_rejected, record_groq_key_status
 
 # Use the same logger as sai.py
 logger = logging.getLogger('ChainOfThought')
 
+# Phrases that identify a single agent unambiguously; when exactly one agent's phrases match,
+# routing skips the Groq call entirely
+FAST_ROUTE_PHRASES = {
+    "CardServicesAgent": ("lost card", "lost my card", "stolen card", "card was stolen", "card stolen"),
+    "TravelNoticeAgent": ("travel notice",)
+}
+
+# One customer turn of the transcript main.py builds: a "Customer:" line up to the next speaker label
+CUSTOMER_TURN_RE = re.compile(r"^Customer:(.*?)(?=^(?:Customer|Agent):|\Z)", re.MULTILINE | re.DOTALL)
+
+def _routing_rule(agent, keywords, patterns):
+    # Keywords keep their display spelling for the reasoning log next to the lowercased form that is matched
+    return {
+        "agent": agent,
+        "keywords": tuple((kw, kw.lower()) for kw in keywords),
+        "patterns": tuple(re.compile(p) for p in patterns)
+    }
+
+# Rule-based routing signals, recorded in the reasoning log for transparency
+ROUTING_RULES = (
+    _routing_rule(
+        "TravelNoticeAgent",
+        ["travel notice", "travel plan", "trip notification", "going abroad", "traveling to",
+         "activate travel", "travel alert", "international travel", "foreign transaction"],
+        [
+            r"(?i).*\b(travel|trip)\b.*\b(notice|notification|alert)\b.*",
+            r"(?i).*\b(activate|update|submit)\b.*\b(travel|trip)\b.*",
+            r"(?i).*\b(travel|trip|traveling|going)\b.*\b(to|abroad|overseas|internationally)\b.*"
+        ]
+    ),
+    _routing_rule(
+        "TransactionAnalysisAgent",
+        ["transaction", "purchase", "payment", "declined", "approved", "charge",
+         "spent", "buy", "bought", "paid", "decline"],
+        [
+            r"(?i).*\b(transaction|purchase|payment|charge)\b.*\b(declined|denied|failed|rejected)\b.*",
+            r"(?i).*\b(why|how)\b.*\b(transaction|payment|card)\b.*\b(declined|denied|failed|rejected)\b.*",
+            r"(?i).*\b(check|review|view|explain)\b.*\b(transaction|purchase|payment|charge)\b.*"
+        ]
+    ),
+    _routing_rule(
+        "CardServicesAgent",
+        ["card", "credit card", "debit card", "visa", "mastercard", "replace", "activate card",
+         "lost card", "stolen card", "new card", "card limit", "credit limit"],
+        [
+            r"(?i).*\b(card)\b.*\b(lost|stolen|damaged|broken|replace|new|activate)\b.*",
+            r"(?i).*\b(credit|debit)\b.*\b(limit|balance|available|increase|decrease)\b.*",
+            r"(?i).*\b(report|freeze|block|unblock|lock|unlock)\b.*\b(card|account)\b.*"
+        ]
+    ),
+    _routing_rule(
+        "GeneralInquiryAgent",
+        ["help", "support", "question", "inquiry", "information", "how do I", "how to",
+         "what is", "account", "balance", "statement"],
+        [
+            r"(?i).*\b(what|how|when|where|why|who)\b.*\b(account|balance|statement|fee|charge)\b.*",
+            r"(?i).*\b(help|assist|support)\b.*\b(with|me|please|need)\b.*",
+            r"(?i).*\b(account|profile|settings|preferences)\b.*\b(view|change|update|modify)\b.*"
+        ]
+    )
+)
+
+# Single-word context signals are looked up in the prompt's word set; \b-delimited matching on a word
+# is the same as that word being one of the prompt's \w+ runs
+WORD_RE = re.compile(r"\w+")
+TRAVEL_CONTEXT_LOCATIONS = ("tokyo", "japan", "berlin", "germany", "barcelona", "spain")
+
 class RouterAgent:
     """
     AI-driven agent responsible for analyzing user prompts and routing to specialized agents using Groq API.
@@ -312,12 +380,22 @@ Return ONLY the JSON object, no extra text.
         logger.debug("Performing rule-based analysis")
         self._rule_based_analysis(user_prompt, reasoning_log)
 
+        fast_agent = self._fast_route(user_prompt)
+        if fast_agent:
+            reasoning_log["routing_decision"] = f"Fast-path keyword match selected {fast_agent}; AI routing skipped."
+            reasoning_log["final_agent"] = fast_agent
+            reasoning_log["confidence_scores"] = {agent: 0.0 for agent in self.agents}
+            reasoning_log["confidence_scores"][fast_agent] = 1.0
+            reasoning_log["ai_reasoning"] = "fast-path keyword match"
+            logger.info("Fast-path routed to %s without Groq API call", fast_agent)
+            return fast_agent, reasoning_log
+
         # Prepare Groq API call
         prompt = self.routing_prompt.format(
             agents=self.agents,
-            customer_data=json.dumps(self.customer_data, indent=2),
-            recent_transactions=json.dumps(self.recent_transactions, indent=2),
-            travel_notice_data=json.dumps(self.travel_notice_data, indent=2),
+            customer_data=orjson.dumps(self.customer_data).decode(),
+            recent_transactions=orjson.dumps(self.recent_transactions).decode(),
+            travel_notice_data=orjson.dumps(self.travel_notice_data).decode(),
             query=user_prompt
         )
         messages = [{"role": "system", "content": prompt}]
@@ -328,6 +406,7 @@ Return ONLY the JSON object, no extra text.
         if error:
             logger.error("Groq API error: %s", error)
             reasoning_log["routing_decision"] = f"Error in AI routing: {error}. Defaulting to GeneralInquiryAgent."
+            reasoning_log["api_error"] = error
             reasoning_log["final_agent"] = "GeneralInquiryAgent"
             reasoning_log["confidence_scores"] = {agent: 0.0 for agent in self.agents}
             reasoning_log["confidence_scores"]["GeneralInquiryAgent"] = 0.5
@@ -336,7 +415,7 @@ Return ONLY the JSON object, no extra text.
 
         # Parse AI response
         try:
-            result = json.loads(response)
+            result = orjson.loads(CODE_FENCE_RE.sub("", response).strip())
             selected_agent = result.get("agent", "GeneralInquiryAgent")
             ai_reasoning = result.get("reasoning", "No reasoning provided by AI.")
             confidence = result.get("confidence", 0.5)
@@ -357,7 +436,7 @@ Return ONLY the JSON object, no extra text.
             logger.info("Selected agent: %s with confidence: %.2f", selected_agent, confidence)
             logger.debug("Routing log: %s", reasoning_log)
 
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             logger.error("Invalid JSON response from Groq API: %s", str(e))
             reasoning_log["routing_decision"] = "Error parsing AI response. Defaulting to GeneralInquiryAgent."
             reasoning_log["final_agent"] = "GeneralInquiryAgent"
@@ -373,61 +452,20 @@ Return ONLY the JSON object, no extra text.
         Performs rule-based analysis to enrich reasoning_log (optional, for transparency).
         """
         logger.debug("Starting rule-based analysis for prompt: %s", user_prompt)
-        routing_rules = [
-            {
-                "agent": "TravelNoticeAgent",
-                "keywords": ["travel notice", "travel plan", "trip notification", "going abroad", "traveling to",
-                            "activate travel", "travel alert", "international travel", "foreign transaction"],
-                "patterns": [
-                    r"(?i).*\b(travel|trip)\b.*\b(notice|notification|alert)\b.*",
-                    r"(?i).*\b(activate|update|submit)\b.*\b(travel|trip)\b.*",
-                    r"(?i).*\b(travel|trip|traveling|going)\b.*\b(to|abroad|overseas|internationally)\b.*"
-                ]
-            },
-            {
-                "agent": "TransactionAnalysisAgent",
-                "keywords": ["transaction", "purchase", "payment", "declined", "approved", "charge",
-                            "spent", "buy", "bought", "paid", "decline"],
-                "patterns": [
-                    r"(?i).*\b(transaction|purchase|payment|charge)\b.*\b(declined|denied|failed|rejected)\b.*",
-                    r"(?i).*\b(why|how)\b.*\b(transaction|payment|card)\b.*\b(declined|denied|failed|rejected)\b.*",
-                    r"(?i).*\b(check|review|view|explain)\b.*\b(transaction|purchase|payment|charge)\b.*"
-                ]
-            },
-            {
-                "agent": "CardServicesAgent",
-                "keywords": ["card", "credit card", "debit card", "visa", "mastercard", "replace", "activate card",
-                            "lost card", "stolen card", "new card", "card limit", "credit limit"],
-                "patterns": [
-                    r"(?i).*\b(card)\b.*\b(lost|stolen|damaged|broken|replace|new|activate)\b.*",
-                    r"(?i).*\b(credit|debit)\b.*\b(limit|balance|available|increase|decrease)\b.*",
-                    r"(?i).*\b(report|freeze|block|unblock|lock|unlock)\b.*\b(card|account)\b.*"
-                ]
-            },
-            {
-                "agent": "GeneralInquiryAgent",
-                "keywords": ["help", "support", "question", "inquiry", "information", "how do I", "how to",
-                            "what is", "account", "balance", "statement"],
-                "patterns": [
-                    r"(?i).*\b(what|how|when|where|why|who)\b.*\b(account|balance|statement|fee|charge)\b.*",
-                    r"(?i).*\b(help|assist|support)\b.*\b(with|me|please|need)\b.*",
-                    r"(?i).*\b(account|profile|settings|preferences)\b.*\b(view|change|update|modify)\b.*"
-                ]
-            }
-        ]
+        prompt_lower = user_prompt.lower()
 
         # Keyword matches
-        for rule in routing_rules:
+        for rule in ROUTING_RULES:
             agent = rule["agent"]
-            keyword_matches = [kw for kw in rule["keywords"] if kw.lower() in user_prompt.lower()]
+            keyword_matches = [kw for kw, kw_lower in rule["keywords"] if kw_lower in prompt_lower]
             if keyword_matches:
                 reasoning_log["keyword_matches"][agent] = keyword_matches
                 logger.debug("Keyword matches for %s: %s", agent, keyword_matches)
 
         # Pattern matches
-        for rule in routing_rules:
+        for rule in ROUTING_RULES:
             agent = rule["agent"]
-            pattern_matches = [p for p in rule["patterns"] if re.search(p, user_prompt)]
+            pattern_matches = [p.pattern for p in rule["patterns"] if p.search(user_prompt)]
             if pattern_matches:
                 reasoning_log["pattern_matches"][agent] = pattern_matches
                 logger.debug("Pattern matches for %s: %s", agent, pattern_matches)
@@ -441,11 +479,21 @@ Return ONLY the JSON object, no extra text.
         else:
             logger.debug("No context clues found")
 
+    def _fast_route(self, user_prompt: str) -> Optional[str]:
+        """Returns the agent when exactly one agent's unambiguous phrases appear in the latest customer turn."""
+        # Only the newest turn counts, so a phrase from earlier in the conversation cannot pin the routing
+        customer_turns = CUSTOMER_TURN_RE.findall(user_prompt)
+        prompt_lower = (customer_turns[-1] if customer_turns else user_prompt).lower()
+        matched = [agent for agent, phrases in FAST_ROUTE_PHRASES.items()
+                   if any(phrase in prompt_lower for phrase in phrases)]
+        return matched[0] if len(matched) == 1 else None
+
     def _analyze_context(self, user_prompt: str) -> Dict[str, int]:
         """Analyzes user prompt against recent activity for additional context."""
         logger.debug("Analyzing context for prompt: %s", user_prompt)
         context_clues = {}
         prompt_lower = user_prompt.lower()
+        prompt_words = set(WORD_RE.findall(prompt_lower))
 
         # Check for mentions of recent transactions
         for transaction in self.recent_transactions:
@@ -467,21 +515,20 @@ Return ONLY the JSON object, no extra text.
                 logger.debug("Travel context matched: country=%s, score=%d", 
                              country, context_clues.get("TravelNoticeAgent", 0))
 
-        if re.search(r"\btravel\b", prompt_lower) and re.search(r"\bnotice\b", prompt_lower):
+        if "travel" in prompt_words and "notice" in prompt_words:
             context_clues["TravelNoticeAgent"] = context_clues.get("TravelNoticeAgent", 0) + 3
             logger.debug("Travel notice keywords matched, score=%d", 
                          context_clues.get("TravelNoticeAgent", 0))
 
         # Check for card-related context
-        if re.search(r"\blost\b", prompt_lower) and re.search(r"\bcard\b", prompt_lower):
+        if "lost" in prompt_words and "card" in prompt_words:
             context_clues["CardServicesAgent"] = context_clues.get("CardServicesAgent", 0) + 3
             logger.debug("Card loss context matched, score=%d", 
                          context_clues.get("CardServicesAgent", 0))
 
         # Check for specific location keywords hinting at travel
-        travel_locations = ["tokyo", "japan", "berlin", "germany", "barcelona", "spain"]
-        for loc in travel_locations:
-            if re.search(r'\b' + loc + r'\b', prompt_lower):
+        for loc in TRAVEL_CONTEXT_LOCATIONS:
+            if loc in prompt_words:
                 context_clues["TravelNoticeAgent"] = context_clues.get("TravelNoticeAgent", 0) + 1
                 logger.debug("Travel location matched: %s, score=%d", 
                              loc, context_clues.get("TravelNoticeAgent", 0))
@@ -491,6 +538,9 @@ Return ONLY the JSON object, no extra text.
     def _make_groq_request(self, messages: List[Dict]) -> Tuple[Optional[str], Optional[str]]:
         """Makes a request to the Groq API."""
         logger.debug("Making Groq API request with %d messages", len(messages))
+        key_hash = api_key_hash(self.groq_api_key or "")
+        if is_groq_key_rejected(key_hash):
+            return None, "API error: 401. Please check your API key."
         try:
             headers = {
                 "Authorization": f"Bearer {self.groq_api_key}",
@@ -503,11 +553,12 @@ Return ONLY the JSON object, no extra text.
                 "temperature": 0.7,
                 "max_tokens": 1000
             }
-            response = requests.post(url, headers=headers, json=payload)
+            response = groq_session.post(url, headers=headers, json=payload, timeout=GROQ_TIMEOUT)
+            record_groq_key_status(key_hash, response.status_code)
             if response.status_code != 200:
                 logger.error("Groq API error: %s - %s", response.status_code, response.text)
                 return None, f"API error: {response.status_code} - {response.text}"
-            content = response.json()["choices"][0]["message"]["content"].strip()
+            content = orjson.loads(response.content)["choices"][0]["message"]["content"].strip()
             logger.info("Groq API request successful")
             return content, None
         except requests.RequestException as e:
@@ -1,4 +1,14 @@
-STYLES = """
+import re
+from string import Template
+
+
+def _minify_css(css):
+    # Drop comments and formatting whitespace; the styles are re-sent to the browser on every rerun
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};:,])\s*", r"\1", css).strip()
+
+STYLES = _minify_css("""
 <style>
     .main-header {
         font-size: 2.5rem;
@@ -42,8 +52,8 @@ STYLES = """
         font-weight: bold;
     }
 </style>
-"""
-CHAT_BOX_STYLES = """
+""")
+CHAT_BOX_STYLES = _minify_css("""
 <style>
 .chat-message {
     margin-bottom: 1rem;
@@ -64,8 +74,12 @@ CHAT_BOX_STYLES = """
 .timestamp {
     text-align: right;
     margin-top: 0.25rem;
+}
 </style>
-"""
+""")
+
+# Every demo transaction was made on the same card
+_DEMO_CARD = "World Traveler Visa ending in 7842"
 
 DEMO_TEMPLATES = {
     "Card Declined While Traveling": {
@@ -96,7 +110,7 @@ DEMO_TEMPLATES = {
         "location": "New York, USA",
         "amount": "$5.75",
         "status": "Approved",
-        "card_used": "World Traveler Visa ending in 7842"
+        "card_used": _DEMO_CARD
     },
     {
         "date": "April 2, 2025",
@@ -105,7 +119,7 @@ DEMO_TEMPLATES = {
         "amount": "¥3,200",
         "status": "Declined",
         "reason": "Insufficient funds",
-        "card_used": "World Traveler Visa ending in 7842"
+        "card_used": _DEMO_CARD
     },
     {
         "date": "March 30, 2025",
@@ -113,7 +127,7 @@ DEMO_TEMPLATES = {
         "location": "Berlin, Germany",
         "amount": "€22.40",
         "status": "Approved",
-        "card_used": "World Traveler Visa ending in 7842"
+        "card_used": _DEMO_CARD
     },
     {
         "date": "March 25, 2025",
@@ -122,7 +136,7 @@ DEMO_TEMPLATES = {
         "amount": "€65.00",
         "status": "Declined",
         "reason": "Card reported lost",
-        "card_used": "World Traveler Visa ending in 7842"
+        "card_used": _DEMO_CARD
     },
     {
         "date": "March 22, 2025",
@@ -130,53 +144,52 @@ DEMO_TEMPLATES = {
         "location": "Online",
         "amount": "$120.99",
         "status": "Approved",
-        "card_used": "World Traveler Visa ending in 7842"
+        "card_used": _DEMO_CARD
     }
 ]
 
     }
 }
 
-sentiment_prompt = """
+# Each prompt is a static instruction block, sent as its own system message so it is a byte-identical
+# prefix on every call (provider prompt caching), followed by a user message from a small data Template
+sentiment_instructions = """
 You are a sentiment analysis engine.
 
 Given a customer message, respond with a **strict JSON object** in the following format:
 
-{{
+{
   "sentiment": "POSITIVE" | "NEGATIVE" | "NEUTRAL",
   "confidence": float between 0 and 1,
   "emotions": [list of detected emotions like "joy", "anger", "frustration", etc.],
   "key_points": [list of important phrases from the input]
-}}
+}
 
 Return ONLY the JSON. Do NOT include explanations, markdown formatting, or any extra text.
 
 INPUT:
-"{transcript}"
 """
 
-action_prompt = """
+sentiment_data_template = Template(""""$transcript"
+""")
+
+action_instructions = """
 You are a virtual banking assistant trained to suggest intelligent next-best-actions for customer service agents.
 
-Based on the customer interaction details below, return a JSON array of the top 5 recommended actions. Each action must include:
+Based on the customer interaction details below, return a JSON object with an "actions" key holding an array of the top 5 recommended actions. Each action must include:
 
 - "action": Concise action title
 - "description": Detailed instruction for the agent
 - "priority": One of ["High", "Medium", "Low"]
 - "category": One of ["Technical Resolution", "Customer Service", "Sales Opportunity", "Fraud Prevention", "General Inquiry"]
 
-DATA PROVIDED:
-- CUSTOMER INFO: {customer_data}
-- RECENT TRANSACTION: {recent_transaction}
-- TRAVEL NOTICE: {travel_notice}
-- CALL TRANSCRIPT: {transcript}
-- SENTIMENT ANALYSIS: {sentiment_result}
-
 Return only valid JSON — no explanations, notes, or extra text.
+
+DATA PROVIDED:
 """
 
 
-reasoning_prompt = """
+reasoning_instructions = """
 You are a senior customer experience analyst for a global bank. Perform a deep-dive diagnostic of the customer interaction below.
 
 Include expert-level insights across these six areas:
@@ -188,17 +201,55 @@ Include expert-level insights across these six areas:
 5. **Opportunity Analysis** — Are there upsell, cross-sell, or loyalty-building opportunities?
 6. **Long-term Relationship Considerations** — What can be done to strengthen long-term trust and satisfaction?
 
-CONTEXT DATA:
-- CUSTOMER INFO: {customer_data}
-- RECENT TRANSACTION: {recent_transaction}
-- TRAVEL NOTICE: {travel_notice}
-- CALL TRANSCRIPT: {transcript}
-- SENTIMENT ANALYSIS: {sentiment_result}
-
 Return a detailed and well-structured narrative under each section header.
+
+CONTEXT DATA:
 """
 
-SAMPLE_QUERIES = [
+# Shared by the action and reasoning prompts
+context_data_template = Template("""- CUSTOMER INFO: $customer_data
+- RECENT TRANSACTION: $recent_transaction
+- TRAVEL NOTICE: $travel_notice
+- CALL TRANSCRIPT: $transcript
+- SENTIMENT ANALYSIS: $sentiment_result
+""")
+
+# Prebuilt once so every request carries the identical system message object
+sentiment_system_message = {"role": "system", "content": sentiment_instructions}
+action_system_message = {"role": "system", "content": action_instructions}
+reasoning_system_message = {"role": "system", "content": reasoning_instructions}
+
+def build_sentiment_messages(transcript):
+    return [
+        sentiment_system_message,
+        {"role": "user", "content": sentiment_data_template.substitute(transcript=transcript)}
+    ]
+
+def build_action_messages(customer_data, recent_transaction, travel_notice, transcript, sentiment_result):
+    return [
+        action_system_message,
+        {"role": "user", "content": context_data_template.substitute(
+            customer_data=customer_data,
+            recent_transaction=recent_transaction,
+            travel_notice=travel_notice,
+            transcript=transcript,
+            sentiment_result=sentiment_result
+        )}
+    ]
+
+def build_reasoning_messages(customer_data, recent_transaction, travel_notice, transcript, sentiment_result):
+    return [
+        reasoning_system_message,
+        {"role": "user", "content": context_data_template.substitute(
+            customer_data=customer_data,
+            recent_transaction=recent_transaction,
+            travel_notice=travel_notice,
+            transcript=transcript,
+            sentiment_result=sentiment_result
+        )}
+    ]
+
+SAMPLE_QUERIES = (
     "Why was my transaction declined in Japan?",
     "I need to activate my travel notice",
     "I want to report my card as lost",
@@ -207,4 +258,4 @@ SAMPLE_QUERIES = [
     "Update my contact preferences",
     "I'm traveling to Germany next week",
     "I need a new card"
-]
\ No newline at end of file
+)
\ No newline at end of file
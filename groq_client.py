@@ -0,0 +1,61 @@
+import re
+import hashlib
+import time
+import requests
+from urllib3.util.retry import Retry
+
+# Transient Groq failures (rate limits, gateway errors) are retried on the pooled session;
+# the last response is still returned so the status-code handling reports it.
+# Read timeouts are not retried: the completion may already be running (and billed), and
+# each resend would block for another full read timeout. Retry-After is ignored so a 429
+# backs off for at most the short exponential delay instead of whatever the server asks.
+GROQ_RETRY = Retry(
+    total=2,
+    read=False,
+    backoff_factor=0.2,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"POST"}),
+    respect_retry_after_header=False,
+    raise_on_status=False
+)
+
+# (connect, read) seconds: fail fast on an unreachable host but give long completions time to finish
+GROQ_TIMEOUT = (3.05, 30)
+
+# One pooled session per process, shared by routing and the analysis calls so they reuse keep-alive connections
+groq_session = requests.Session()
+groq_session.headers["Content-Type"] = "application/json"
+groq_session.mount("https://", requests.adapters.HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=10,
+    max_retries=GROQ_RETRY
+))
+
+# Seconds a key Groq answered 401 for is refused locally; a key fixed at the provider works again afterwards
+REJECTED_KEY_TTL = 5 * 60
+
+# API key hash -> monotonic time its rejection expires
+_rejected_groq_keys = {}
+
+def api_key_hash(groq_api_key: str) -> str:
+    return hashlib.sha256(groq_api_key.encode()).hexdigest()
+
+def is_groq_key_rejected(key_hash: str) -> bool:
+    """True while a recent 401 for this key is still within REJECTED_KEY_TTL."""
+    expires = _rejected_groq_keys.get(key_hash)
+    if expires is None:
+        return False
+    if time.monotonic() >= expires:
+        _rejected_groq_keys.pop(key_hash, None)
+        return False
+    return True
+
+def record_groq_key_status(key_hash: str, status_code: int):
+    """Remembers a 401 for the key, and forgets it once the key gets a successful response."""
+    if status_code == 401:
+        _rejected_groq_keys[key_hash] = time.monotonic() + REJECTED_KEY_TTL
+    elif status_code == 200:
+        _rejected_groq_keys.pop(key_hash, None)
+
+# Markdown code fences the model sometimes wraps around a JSON reply
+CODE_FENCE_RE = re.compile(r"^```(?:json)?\s*|\s*```$", re.MULTILINE)
@@ -1,326 +1,544 @@
 import streamlit as st
-import pandas as pd
-import plotly.express as px
-import json
+import orjson
 from datetime import datetime
-import time
 import logging
-from constants import DEMO_TEMPLATES, sentiment_prompt, action_prompt, reasoning_prompt, STYLES, CHAT_BOX_STYLES
+from concurrent.futures import ThreadPoolExecutor
+import time
+import hashlib
+from constants import DEMO_TEMPLATES, build_sentiment_messages, build_action_messages, build_reasoning_messages, STYLES, CHAT_BOX_STYLES
 from agent_router import RouterAgent
+from groq_client import groq_session, GROQ_TIMEOUT, CODE_FENCE_RE, api_key_hash, is_groq_key_rejected, record_groq_key_status
 from specialized_agents import get_agent_for_routing
 import requests
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
-# Configure logging with a custom handler for chain_of_thought
-logging.basicConfig(level=logging.INFO)
-logger = logging.getLogger('ChainOfThought')
+CHAIN_FORMATTER = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
-if "chain_of_thought" not in st.session_state:
-    st.session_state.chain_of_thought = []
+# Both stylesheets go out in a single element on each rerun
+ALL_CSS = STYLES + CHAT_BOX_STYLES
 
+# Seconds between reruns that poll a running background analysis
+ANALYSIS_POLL_INTERVAL = 0.5
 
+# Groq's fastest tier; sentiment and action calls return short, schema-bound JSON
+STRUCTURED_TASK_MODEL = "llama-3.1-8b-instant"
 
-# Custom handler to append logs to chain_of_thought
-class ChainOfThoughtHandler(logging.Handler):
-    def __init__(self, update_callback=None):
-        super().__init__()
-        self.update_callback = update_callback
+# Groq's OpenAI-compatible JSON mode; the reply is always a single parseable JSON object
+JSON_RESPONSE_FORMAT = {"type": "json_object"}
 
-    def emit(self, record):
-        log_message = self.format(record)
-        # Assuming chain_of_thought is accessible via st.session_state
-        if 'chain_of_thought' in st.session_state:
-            st.session_state.chain_of_thought += f"{log_message}\n"
-            if self.update_callback:
-                self.update_callback(st.session_state.chain_of_thought)
+# Minimum seconds between chain-of-thought repaints while a response is streaming
+STREAM_REFRESH_INTERVAL = 0.1
+
+# Clock time shown under each chat message
+CHAT_TIME_FORMAT = "%I:%M %p"
 
+TRANSCRIPT_ROLE_LABELS = {"user": "Customer", "assistant": "Agent"}
 
-# Add custom handler to logger
-chain_handler = ChainOfThoughtHandler()
-formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-chain_handler.setFormatter(formatter)
-logger.addHandler(chain_handler)
+SENTIMENT_LABELS = frozenset({"POSITIVE", "NEGATIVE", "NEUTRAL"})
 
+# Fallback used whenever the sentiment call fails or returns a reply without a valid label and confidence
+DEFAULT_SENTIMENT = {"sentiment": "NEUTRAL", "confidence": 0.5, "emotions": [], "key_points": []}
+
+# Single recommendation shown whenever the action call fails or returns unusable JSON
+FALLBACK_ACTION = {
+    "action": "Follow-up Call",
+    "description": "Schedule a follow-up call to address the issue manually.",
+    "priority": "High",
+    "category": "Customer Support",
+    "icon": "📞"
+}
 
+# Custom handler that keeps the analysis log lines for the session
+class ChainOfThoughtHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self._emitting = False
 
-def analyze_with_groq(transcript, customer_data, travel_notice_data, recent_transaction, model, groq_api_key, update_callback=None):
+    def emit(self, record):
+        # Handler.handle holds self.lock, so this only trips if something below logs back into us
+        if self._emitting:
+            return
+        self._emitting = True
+        try:
+            # A list append instead of growing chain_of_thought, which analyze_with_groq owns
+            log_lines = st.session_state.get("chain_of_thought_log")
+            if log_lines is not None:
+                log_lines.append(self.format(record))
+        finally:
+            self._emitting = False
+
+
+# Configure logging with a custom handler for chain_of_thought, once per process rather than per rerun
+@st.cache_resource
+def _init_logging():
+    logging.basicConfig(level=logging.INFO)
+    chain_logger = logging.getLogger('ChainOfThought')
+    # An edited main.py gets a fresh cache entry, so drop the handler a previous version installed
+    for handler in list(chain_logger.handlers):
+        if handler.get_name() == "chain_of_thought":
+            chain_logger.removeHandler(handler)
+    chain_handler = ChainOfThoughtHandler()
+    chain_handler.set_name("chain_of_thought")
+    chain_handler.setFormatter(CHAIN_FORMATTER)
+    chain_logger.addHandler(chain_handler)
+    return chain_logger
+
+logger = _init_logging()
+
+
+
+def analyze_with_groq(transcript, customer_data, travel_notice_data, recent_transaction, model, groq_api_key, update_callback=None, progress_callback=None, model_map=None):
+    # Routing and the reasoning narrative use the selected model; the bounded JSON tasks default to the fast tier
+    model_map = {"sentiment": STRUCTURED_TASK_MODEL, "action": STRUCTURED_TASK_MODEL, "reasoning": model, **(model_map or {})}
     sentiment_result = {}
     recommended_actions = []
-    st.session_state.chain_of_thought = "Starting analysis...\n"
-    chain_of_thought = st.session_state.chain_of_thought
+    # Failed Groq calls, so the caller knows the results include fallbacks
+    groq_errors = []
+    # Chain-of-thought lines are collected in a list and joined only at checkpoints
+    cot_parts = ["Starting analysis...\n"]
+    st.session_state.chain_of_thought = cot_parts[0]
+
+    def flush_chain_of_thought():
+        chain_of_thought = "".join(cot_parts)
+        st.session_state.chain_of_thought = chain_of_thought
+        if update_callback:
+            update_callback(chain_of_thought)
+        return chain_of_thought
 
-    # Update logger's custom handler with the current callback
-    for handler in logger.handlers:
-        if isinstance(handler, ChainOfThoughtHandler):
-            handler.update_callback = update_callback
+    st.session_state.chain_of_thought_log = []
+    # The agents take a list; normalize once for every handoff below
+    recent_transactions = recent_transaction if isinstance(recent_transaction, list) else [recent_transaction]
 
     # Validate transcript
     if not transcript.strip():
-        chain_of_thought += "Error: No customer input provided. Please enter a query in the Customer Chat to proceed with analysis.\n"
+        cot_parts.append("Error: No customer input provided. Please enter a query in the Customer Chat to proceed with analysis.\n")
         logger.error("No customer input provided")
-        if update_callback:
-            update_callback(chain_of_thought)
-        return sentiment_result, recommended_actions, chain_of_thought
+        return sentiment_result, recommended_actions, flush_chain_of_thought(), groq_errors
+
+    # Sentiment only needs the transcript, so start it now and let it overlap with routing
+    sentiment_messages = build_sentiment_messages(transcript)
+    sentiment_future = submit_groq_request(
+        sentiment_messages, model_map["sentiment"], groq_api_key,
+        temperature=0, max_tokens=200, response_format=JSON_RESPONSE_FORMAT
+    )
 
     # Initialize RouterAgent with Groq API key
-    chain_of_thought += "\n=== Routing Agent Analysis ===\n"
-    chain_of_thought += "Initializing AI-driven RouterAgent to determine the appropriate specialized agent...\n"
+    cot_parts.append("\n=== Routing Agent Analysis ===\n")
+    cot_parts.append("Initializing AI-driven RouterAgent to determine the appropriate specialized agent...\n")
     logger.info("Initializing RouterAgent")
-    router = RouterAgent(customer_data, travel_notice_data, recent_transaction if isinstance(recent_transaction, list) else [recent_transaction], groq_api_key, model)
+    router = RouterAgent(customer_data, travel_notice_data, recent_transactions, groq_api_key, model)
     
     # Detailed routing process
-    chain_of_thought += f"User query received: '{transcript}'\n"
-    chain_of_thought += "Step 1: Sending query to Groq API for AI-based routing...\n"
-    logger.info(f"Routing query: {transcript}")
+    cot_parts.append(f"User query received: '{transcript}'\n")
+    cot_parts.append("Step 1: Sending query to Groq API for AI-based routing...\n")
+    logger.info("Routing query: %s", transcript)
     selected_agent_name, routing_log = router.route(transcript)
+    if routing_log.get("api_error"):
+        groq_errors.append(routing_log["api_error"])
 
     st.session_state.selected_agent = selected_agent_name
     
     # Log AI routing details
-    chain_of_thought += "AI routing results:\n"
-    chain_of_thought += f"- Selected agent: {selected_agent_name}\n"
-    chain_of_thought += f"- AI reasoning: {routing_log.get('ai_reasoning', 'No AI reasoning provided')}\n"
-    logger.info(f"Selected agent: {selected_agent_name}")
-    chain_of_thought += "- Confidence scores:\n"
-    confidence_scores = routing_log.get('confidence_scores', {})
+    cot_parts.append("AI routing results:\n")
+    cot_parts.append(f"- Selected agent: {selected_agent_name}\n")
+    cot_parts.append(f"- AI reasoning: {routing_log.get('ai_reasoning', 'No AI reasoning provided')}\n")
+    logger.info("Selected agent: %s", selected_agent_name)
+    cot_parts.append("- Confidence scores:\n")
+    confidence_scores = routing_log.get('confidence_scores') or {}
+    keyword_matches = routing_log.get('keyword_matches') or {}
+    pattern_matches = routing_log.get('pattern_matches') or {}
+    context_analysis = routing_log.get('context_analysis') or {}
     if confidence_scores:
-        chain_of_thought += "  Calculation breakdown:\n"
-        chain_of_thought += "  - Confidence scores are computed as a weighted combination of keyword matches, pattern matches, and context analysis.\n"
-        chain_of_thought += "  - Weights (assumed typical values, may vary):\n"
-        chain_of_thought += "    - Keyword matches: 40% (based on number and relevance of matched keywords)\n"
-        chain_of_thought += "    - Pattern matches: 30% (based on number and specificity of regex patterns)\n"
-        chain_of_thought += "    - Context analysis: 30% (based on relevance to recent transactions, travel notices, etc.)\n"
+        cot_parts.append("  Calculation breakdown:\n")
+        cot_parts.append("  - Confidence scores are computed as a weighted combination of keyword matches, pattern matches, and context analysis.\n")
+        cot_parts.append("  - Weights (assumed typical values, may vary):\n")
+        cot_parts.append("    - Keyword matches: 40% (based on number and relevance of matched keywords)\n")
+        cot_parts.append("    - Pattern matches: 30% (based on number and specificity of regex patterns)\n")
+        cot_parts.append("    - Context analysis: 30% (based on relevance to recent transactions, travel notices, etc.)\n")
         for agent, score in confidence_scores.items():
-            chain_of_thought += f"    - {agent}: {score:.2f}\n"
-            keyword_count = len(routing_log.get('keyword_matches', {}).get(agent, []))
-            pattern_count = len(routing_log.get('pattern_matches', {}).get(agent, []))
-            context_score = routing_log.get('context_analysis', {}).get(agent, 0)
-            chain_of_thought += f"      - Keywords matched: {keyword_count} (contributes to score)\n"
-            chain_of_thought += f"      - Patterns matched: {pattern_count} (contributes to score)\n"
-            chain_of_thought += f"      - Context relevance: {context_score:.2f} (based on transaction/travel data)\n"
-            logger.debug(f"Agent {agent}: Keywords={keyword_count}, Patterns={pattern_count}, Context={context_score:.2f}")
+            cot_parts.append(f"    - {agent}: {score:.2f}\n")
+            keyword_count = len(keyword_matches.get(agent, ()))
+            pattern_count = len(pattern_matches.get(agent, ()))
+            context_score = context_analysis.get(agent, 0)
+            cot_parts.append(f"      - Keywords matched: {keyword_count} (contributes to score)\n")
+            cot_parts.append(f"      - Patterns matched: {pattern_count} (contributes to score)\n")
+            cot_parts.append(f"      - Context relevance: {context_score:.2f} (based on transaction/travel data)\n")
+            logger.debug("Agent %s: Keywords=%s, Patterns=%s, Context=%.2f", agent, keyword_count, pattern_count, context_score)
     else:
-        chain_of_thought += "  - No confidence scores provided.\n"
+        cot_parts.append("  - No confidence scores provided.\n")
         logger.warning("No confidence scores provided")
     
     # Log rule-based analysis for transparency
-    chain_of_thought += "\nSupplementary rule-based analysis (for transparency):\n"
-    chain_of_thought += "Keyword matches found:\n"
-    for agent, matches in routing_log.get('keyword_matches', {}).items():
-        chain_of_thought += f"- {agent}: {', '.join(matches)}\n"
-        logger.debug(f"Keyword matches for {agent}: {matches}")
-    if not routing_log.get('keyword_matches'):
-        chain_of_thought += "- None\n"
+    cot_parts.append("\nSupplementary rule-based analysis (for transparency):\n")
+    cot_parts.append("Keyword matches found:\n")
+    for agent, matches in keyword_matches.items():
+        cot_parts.append(f"- {agent}: {', '.join(matches)}\n")
+        logger.debug("Keyword matches for %s: %s", agent, matches)
+    if not keyword_matches:
+        cot_parts.append("- None\n")
     
-    chain_of_thought += "\nPattern matches found:\n"
-    for agent, patterns in routing_log.get('pattern_matches', {}).items():
-        chain_of_thought += f"- {agent}: {len(patterns)} pattern(s) matched\n"
+    cot_parts.append("\nPattern matches found:\n")
+    for agent, patterns in pattern_matches.items():
+        cot_parts.append(f"- {agent}: {len(patterns)} pattern(s) matched\n")
         for pattern in patterns:
-            chain_of_thought += f"  - Pattern: {pattern}\n"
-            logger.debug(f"Pattern match for {agent}: {pattern}")
-    if not routing_log.get('pattern_matches'):
-        chain_of_thought += "- None\n"
+            cot_parts.append(f"  - Pattern: {pattern}\n")
+            logger.debug("Pattern match for %s: %s", agent, pattern)
+    if not pattern_matches:
+        cot_parts.append("- None\n")
     
-    chain_of_thought += "\nContext analysis based on recent activity:\n"
-    for agent, score in routing_log.get('context_analysis', {}).items():
-        chain_of_thought += f"- {agent}: Score {score}\n"
+    cot_parts.append("\nContext analysis based on recent activity:\n")
+    for agent, score in context_analysis.items():
+        cot_parts.append(f"- {agent}: Score {score}\n")
         if agent == "TransactionAnalysisAgent" and score > 0:
-            chain_of_thought += "  - Likely due to mentions of recent transaction merchants or locations\n"
+            cot_parts.append("  - Likely due to mentions of recent transaction merchants or locations\n")
         elif agent == "TravelNoticeAgent" and score > 0:
-            chain_of_thought += "  - Likely due to mentions of travel-related locations or keywords\n"
+            cot_parts.append("  - Likely due to mentions of travel-related locations or keywords\n")
         elif agent == "CardServicesAgent" and score > 0:
-            chain_of_thought += "  - Likely due to mentions of card-specific issues like 'lost'\n"
-        logger.debug(f"Context score for {agent}: {score}")
-    if not routing_log.get('context_analysis'):
-        chain_of_thought += "- No significant context clues found\n"
+            cot_parts.append("  - Likely due to mentions of card-specific issues like 'lost'\n")
+        logger.debug("Context score for %s: %s", agent, score)
+    if not context_analysis:
+        cot_parts.append("- No significant context clues found\n")
     
-    chain_of_thought += f"\nRouting decision: {routing_log.get('routing_decision', 'No decision provided')}\n"
-    logger.info(f"Routing decision: {routing_log.get('routing_decision', 'No decision provided')}")
+    routing_decision = routing_log.get('routing_decision', 'No decision provided')
+    cot_parts.append(f"\nRouting decision: {routing_decision}\n")
+    logger.info("Routing decision: %s", routing_decision)
     
-    if update_callback:
-        update_callback(chain_of_thought)
-        st.session_state.chain_of_thought = chain_of_thought
+    flush_chain_of_thought()
+    if progress_callback:
+        progress_callback(20, "Routing complete")
 
     # Perform sentiment analysis
-    chain_of_thought += "\n=== Sentiment Analysis ===\n"
-    chain_of_thought += "Analyzing sentiment using Groq API...\n"
+    cot_parts.append("\n=== Sentiment Analysis ===\n")
+    cot_parts.append("Analyzing sentiment using Groq API...\n")
     logger.info("Starting sentiment analysis")
-    sentiment_messages = [
-        {"role": "system", "content": sentiment_prompt.format(transcript=transcript)}
-    ]
-    sentiment_response, sentiment_error = make_groq_request(sentiment_messages, model, groq_api_key)
+    sentiment_response, sentiment_error = sentiment_future.result()
     if sentiment_error:
-        chain_of_thought += f"Sentiment analysis error: {sentiment_error}\n"
-        logger.error(f"Sentiment analysis error: {sentiment_error}")
-        sentiment_result = {"sentiment": "NEUTRAL", "confidence": 0.5, "emotions": [], "key_points": []}
+        groq_errors.append(sentiment_error)
+        cot_parts.append(f"Sentiment analysis error: {sentiment_error}\n")
+        logger.error("Sentiment analysis error: %s", sentiment_error)
+        sentiment_result = dict(DEFAULT_SENTIMENT)
     else:
         try:
-            sentiment_result = json.loads(sentiment_response)
-            chain_of_thought += f"Sentiment result: {json.dumps(sentiment_result, indent=2)}\n"
-            logger.info(f"Sentiment result: {sentiment_result}")
-        except json.JSONDecodeError:
-            chain_of_thought += "Error: Invalid JSON response from sentiment analysis.\n"
+            sentiment_result = parse_json_response(sentiment_response)
+        except orjson.JSONDecodeError:
+            sentiment_result = None
+        if is_valid_sentiment(sentiment_result):
+            cot_parts.append(f"Sentiment result: {orjson.dumps(sentiment_result, option=orjson.OPT_INDENT_2).decode()}\n")
+            logger.info("Sentiment result: %s", sentiment_result)
+        else:
+            cot_parts.append("Error: Invalid JSON response from sentiment analysis.\n")
             logger.error("Invalid JSON response from sentiment analysis")
-            sentiment_result = {"sentiment": "NEUTRAL", "confidence": 0.5, "emotions": [], "key_points": []}
+            sentiment_result = dict(DEFAULT_SENTIMENT)
     
-    if update_callback:
-        update_callback(chain_of_thought)
-        st.session_state.chain_of_thought = chain_of_thought
+    flush_chain_of_thought()
+    if progress_callback:
+        progress_callback(40, "Sentiment analysis complete")
 
     # Get the specialized agent
-    chain_of_thought += f"\n=== {selected_agent_name} Processing ===\n"
-    chain_of_thought += f"Initializing {selected_agent_name} to process the query...\n"
-    logger.info(f"Initializing {selected_agent_name}")
-    agent = get_agent_for_routing(selected_agent_name, customer_data, travel_notice_data, recent_transaction if isinstance(recent_transaction, list) else [recent_transaction])
+    cot_parts.append(f"\n=== {selected_agent_name} Processing ===\n")
+    cot_parts.append(f"Initializing {selected_agent_name} to process the query...\n")
+    logger.info("Initializing %s", selected_agent_name)
+    agent = get_agent_for_routing(selected_agent_name, customer_data, travel_notice_data, recent_transactions)
     
     # Process with the selected agent
     try:
-        chain_of_thought += f"Processing query: '{transcript}'\n"
-        logger.info(f"{selected_agent_name} processing query: {transcript}")
+        cot_parts.append(f"Processing query: '{transcript}'\n")
+        logger.info("%s processing query: %s", selected_agent_name, transcript)
         agent_result = agent.process(transcript)
         
         # Log detailed agent reasoning
         reasoning_log = agent_result.get('reasoning_log', {})
-        chain_of_thought += "\nDetailed agent reasoning:\n"
+        cot_parts.append("\nDetailed agent reasoning:\n")
         
-        chain_of_thought += "Analysis steps performed:\n"
+        cot_parts.append("Analysis steps performed:\n")
         for step in reasoning_log.get('analysis_steps', []):
-            chain_of_thought += f"- {step}\n"
-            logger.debug(f"Agent step: {step}")
+            cot_parts.append(f"- {step}\n")
+            logger.debug("Agent step: %s", step)
         
-        chain_of_thought += "\nDecision factors considered:\n"
+        cot_parts.append("\nDecision factors considered:\n")
         for factor, value in reasoning_log.get('decision_factors', {}).items():
-            chain_of_thought += f"- {factor}: {value}\n"
-            logger.debug(f"Decision factor: {factor} = {value}")
+            cot_parts.append(f"- {factor}: {value}\n")
+            logger.debug("Decision factor: %s = %s", factor, value)
         
-        chain_of_thought += "\nActions considered:\n"
+        cot_parts.append("\nActions considered:\n")
         for action in reasoning_log.get('actions_considered', []):
-            chain_of_thought += f"- {action['action']} (Reason: {action['reason']})\n"
-            logger.debug(f"Action considered: {action['action']}, Reason: {action['reason']}")
+            cot_parts.append(f"- {action['action']} (Reason: {action['reason']})\n")
+            logger.debug("Action considered: %s, Reason: %s", action['action'], action['reason'])
         
-        chain_of_thought += "\nActions taken:\n"
+        cot_parts.append("\nActions taken:\n")
         for action in reasoning_log.get('actions_taken', []):
-            chain_of_thought += f"- {action['action']}: {action['details']}\n"
-            logger.debug(f"Action taken: {action['action']}, Details: {action['details']}")
+            cot_parts.append(f"- {action['action']}: {action['details']}\n")
+            logger.debug("Action taken: %s, Details: %s", action['action'], action['details'])
         
-        chain_of_thought += f"\nResponse construction logic: {reasoning_log.get('response_construction', 'No construction details')}\n"
-        logger.info(f"Response construction: {reasoning_log.get('response_construction', 'No construction details')}")
+        response_construction = reasoning_log.get('response_construction', 'No construction details')
+        cot_parts.append(f"\nResponse construction logic: {response_construction}\n")
+        logger.info("Response construction: %s", response_construction)
         
-        if update_callback:
-            update_callback(chain_of_thought)
-            st.session_state.chain_of_thought = chain_of_thought
+        flush_chain_of_thought()
             
     except Exception as e:
-        chain_of_thought += f"\nError during {selected_agent_name} processing: {str(e)}\n"
-        logger.error(f"Error in {selected_agent_name}: {str(e)}")
-        sentiment_result = {"sentiment": "NEUTRAL", "confidence": 0.5, "emotions": [], "key_points": []}
-        if update_callback:
-            update_callback(chain_of_thought)
-            st.session_state.chain_of_thought = chain_of_thought
-
-    # Generate recommended actions
-    chain_of_thought += "\n=== Action Recommendation ===\n"
-    chain_of_thought += "Generating next best actions using Groq API...\n"
-    logger.info("Generating recommended actions")
-    action_messages = [
-        {"role": "system", "content": action_prompt.format(
-            customer_data=json.dumps(customer_data),
-            recent_transaction=json.dumps(recent_transaction),
-            travel_notice=json.dumps(travel_notice_data),
-            transcript=transcript,
-            sentiment_result=json.dumps(sentiment_result)
-        )}
-    ]
-    action_response, action_error = make_groq_request(action_messages, model, groq_api_key)
+        cot_parts.append(f"\nError during {selected_agent_name} processing: {str(e)}\n")
+        logger.error("Error in %s: %s", selected_agent_name, e)
+        sentiment_result = dict(DEFAULT_SENTIMENT)
+        flush_chain_of_thought()
+    if progress_callback:
+        progress_callback(60, f"{selected_agent_name} processing complete")
+
+    # Generate recommended actions while the reasoning narrative streams; both depend only on sentiment_result
+    # Both prompts embed the same context, so serialize it once; sorted keys keep the bytes stable across runs
+    customer_data_json = orjson.dumps(customer_data, option=orjson.OPT_SORT_KEYS).decode()
+    recent_transaction_json = orjson.dumps(recent_transaction, option=orjson.OPT_SORT_KEYS).decode()
+    travel_notice_json = orjson.dumps(travel_notice_data, option=orjson.OPT_SORT_KEYS).decode()
+    sentiment_result_json = orjson.dumps(sentiment_result, option=orjson.OPT_SORT_KEYS).decode()
+    action_messages = build_action_messages(
+        customer_data_json, recent_transaction_json, travel_notice_json, transcript, sentiment_result_json
+    )
+    reasoning_messages = build_reasoning_messages(
+        customer_data_json, recent_transaction_json, travel_notice_json, transcript, sentiment_result_json
+    )
+    logger.info("Generating recommended actions and detailed reasoning")
+    reasoning_parts = []
+    reasoning_stream = stream_groq_request(reasoning_messages, model_map["reasoning"], groq_api_key, max_tokens=2000)
+    action_future = submit_groq_request(
+        action_messages, model_map["action"], groq_api_key,
+        temperature=0, max_tokens=600, response_format=JSON_RESPONSE_FORMAT
+    )
+    # Buffer reasoning tokens until the shorter action call returns so the sections keep their order
+    reasoning_error = drain_groq_stream(reasoning_stream, reasoning_parts, stop=action_future.done)
+    action_response, action_error = action_future.result()
+
+    cot_parts.append("\n=== Action Recommendation ===\n")
+    cot_parts.append("Generating next best actions using Groq API...\n")
     if action_error:
-        chain_of_thought += f"Action recommendation error: {action_error}\n"
-        logger.error(f"Action recommendation error: {action_error}")
-        recommended_actions = [{
-            "action": "Follow-up Call",
-            "description": "Schedule a follow-up call to address the issue manually.",
-            "priority": "High",
-            "category": "Customer Support",
-            "icon": "📞"
-        }]
+        groq_errors.append(action_error)
+        cot_parts.append(f"Action recommendation error: {action_error}\n")
+        logger.error("Action recommendation error: %s", action_error)
+        recommended_actions = [dict(FALLBACK_ACTION)]
     else:
         try:
-            recommended_actions = json.loads(action_response)
-            chain_of_thought += f"Recommended actions: {json.dumps(recommended_actions, indent=2)}\n"
-            logger.info(f"Recommended actions: {recommended_actions}")
-        except json.JSONDecodeError:
-            chain_of_thought += "Error: Invalid JSON response from action recommendation.\n"
+            recommended_actions = valid_actions(parse_json_response(action_response))
+        except orjson.JSONDecodeError:
+            recommended_actions = []
+        if recommended_actions:
+            cot_parts.append(f"Recommended actions: {orjson.dumps(recommended_actions, option=orjson.OPT_INDENT_2).decode()}\n")
+            logger.info("Recommended actions: %s", recommended_actions)
+        else:
+            cot_parts.append("Error: Invalid JSON response from action recommendation.\n")
             logger.error("Invalid JSON response from action recommendation")
-            recommended_actions = [{
-                "action": "Follow-up Call",
-                "description": "Schedule a follow-up call to address the issue manually.",
-                "priority": "High",
-                "category": "Customer Support",
-                "icon": "📞"
-            }]
+            recommended_actions = [dict(FALLBACK_ACTION)]
     
-    if update_callback:
-        update_callback(chain_of_thought)
-        st.session_state.chain_of_thought = chain_of_thought
-
-    # Generate detailed reasoning
-    chain_of_thought += "\n=== Detailed Reasoning Analysis ===\n"
-    chain_of_thought += "Generating comprehensive reasoning narrative using Groq API...\n"
-    logger.info("Generating detailed reasoning")
-    reasoning_messages = [
-        {"role": "system", "content": reasoning_prompt.format(
-            customer_data=json.dumps(customer_data),
-            recent_transaction=json.dumps(recent_transaction),
-            travel_notice=json.dumps(travel_notice_data),
-            transcript=transcript,
-            sentiment_result=json.dumps(sentiment_result)
-        )}
-    ]
-    reasoning_response, reasoning_error = make_groq_request(reasoning_messages, model, groq_api_key, max_tokens=2000)
+    flush_chain_of_thought()
+    if progress_callback:
+        progress_callback(80, "Recommended actions ready")
+
+    cot_parts.append("\n=== Detailed Reasoning Analysis ===\n")
+    cot_parts.append("Generating comprehensive reasoning narrative using Groq API...\n")
+    reasoning_prefix = "".join(cot_parts) + "Detailed reasoning:\n"
+    last_refresh = 0.0
+
+    def show_partial_reasoning():
+        nonlocal last_refresh
+        now = time.monotonic()
+        if update_callback and now - last_refresh >= STREAM_REFRESH_INTERVAL:
+            last_refresh = now
+            update_callback(f"{reasoning_prefix}{''.join(reasoning_parts)}")
+
+    if not reasoning_error:
+        reasoning_error = drain_groq_stream(reasoning_stream, reasoning_parts, on_delta=show_partial_reasoning)
     if reasoning_error:
-        chain_of_thought += f"Reasoning analysis error: {reasoning_error}\n"
-        logger.error(f"Reasoning analysis error: {reasoning_error}")
+        groq_errors.append(reasoning_error)
+        cot_parts.append(f"Reasoning analysis error: {reasoning_error}\n")
+        logger.error("Reasoning analysis error: %s", reasoning_error)
     else:
-        chain_of_thought += f"Detailed reasoning:\n{reasoning_response}\n"
-        logger.info(f"Detailed reasoning completed")
+        cot_parts.append(f"Detailed reasoning:\n{''.join(reasoning_parts).strip()}\n")
+        logger.info("Detailed reasoning completed")
     
-    chain_of_thought += "\n=== Analysis Complete ===\n"
+    cot_parts.append("\n=== Analysis Complete ===\n")
     logger.info("Analysis complete")
-    if update_callback:
-        update_callback(chain_of_thought)
-        st.session_state.chain_of_thought = chain_of_thought
+    chain_of_thought = flush_chain_of_thought()
+    if progress_callback:
+        progress_callback(100, "Analysis complete")
     
-    return sentiment_result, recommended_actions, chain_of_thought
+    return sentiment_result, recommended_actions, chain_of_thought, groq_errors
+
+@st.cache_resource
+def _groq_request_pool():
+    # Separate from the analysis pool so a running analysis never waits on its own workers
+    return ThreadPoolExecutor(max_workers=8)
+
+def submit_groq_request(*args, **kwargs):
+    """Runs make_groq_request on the request pool with the caller's script context attached."""
+    ctx = get_script_run_ctx()
+
+    def run():
+        # Without the context the worker's log records never reach this session's chain-of-thought log
+        add_script_run_ctx(ctx=ctx)
+        return make_groq_request(*args, **kwargs)
+
+    return _groq_request_pool().submit(run)
+
+class GroqRequestError(Exception):
+    """Raised for non-200 Groq responses so the failure is reported instead of cached."""
+
+
+def _post_groq_completion(messages_tuple, model, temperature, max_tokens, response_format, key_hash, _groq_api_key):
+    # key_hash keeps cache entries per key; the raw key is underscore-prefixed so st.cache_data never hashes it
+    headers = {
+        "Authorization": f"Bearer {_groq_api_key}"  # Per request so a key changed in the sidebar takes effect
+    }
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    payload = {
+        "model": model,
+        "messages": [{"role": role, "content": content} for role, content in messages_tuple],
+        "temperature": temperature,
+        "max_tokens": max_tokens
+    }
+    if response_format:
+        payload["response_format"] = response_format
+    logger.debug("Sending Groq API request: %s", payload)
+    response = groq_session.post(url, headers=headers, json=payload, timeout=GROQ_TIMEOUT)
+    record_groq_key_status(key_hash, response.status_code)
+    if response.status_code != 200:
+        logger.error("API error: %s - %s", response.status_code, response.text)
+        raise GroqRequestError(f"API error: {response.status_code}. Please check your API key.")
+    body = orjson.loads(response.content)
+    try:
+        content = body["choices"][0]["message"]["content"].strip()
+    except (KeyError, IndexError):
+        logger.error("Unexpected Groq API response: %s", body)
+        raise GroqRequestError("Unexpected response format from Groq API.")
+    logger.info("Groq API request successful")
+    return content
 
-def make_groq_request(messages, model, groq_api_key, temperature=0.7, max_tokens=1000):
+# Bounded so a long session with many distinct conversations cannot grow the cache without limit
+_cached_groq_completion = st.cache_data(ttl=24 * 60 * 60, max_entries=256, show_spinner=False)(_post_groq_completion)
+
+def make_groq_request(messages, model, groq_api_key, temperature=0.7, max_tokens=1000, response_format=None):
     if not groq_api_key:
         logger.error("No API key provided")
         return None, "No API key provided."
+    key_hash = api_key_hash(groq_api_key)
+    if is_groq_key_rejected(key_hash):
+        return None, "API error: 401. Please check your API key."
+    messages_tuple = tuple((message["role"], message["content"]) for message in messages)
+    # Identical prompts return the cached completion; high-temperature calls want fresh samples
+    complete = _post_groq_completion if temperature > 0.7 else _cached_groq_completion
     try:
-        headers = {
-            "Authorization": f"Bearer {groq_api_key}",  # Use provided key
-            "Content-Type": "application/json"
-        }
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens
-        }
-        logger.debug(f"Sending Groq API request: {payload}")
-        response = requests.post(url, headers=headers, json=payload)
-        if response.status_code != 200:
-            logger.error(f"API error: {response.status_code} - {response.text}")
-            return None, f"API error: {response.status_code}. Please check your API key."
-        content = response.json()["choices"][0]["message"]["content"].strip()
-        logger.info("Groq API request successful")
+        content = complete(messages_tuple, model, temperature, max_tokens, response_format, key_hash, groq_api_key)
         return content, None
+    except GroqRequestError as e:
+        return None, str(e)
     except requests.RequestException as e:
-        logger.error(f"Request error: {str(e)}")
+        logger.error("Request error: %s", e)
         return None, f"Network error: {str(e)}"
     except Exception as e:
-        logger.error(f"Unexpected error: {str(e)}")
+        logger.error("Unexpected error: %s", e)
         return None, f"Unexpected error: {str(e)}"
 
+def stream_groq_request(messages, model, groq_api_key, temperature=0.7, max_tokens=1000):
+    """Yields completion text as Groq streams it over server-sent events."""
+    if not groq_api_key:
+        logger.error("No API key provided")
+        raise GroqRequestError("No API key provided.")
+    key_hash = api_key_hash(groq_api_key)
+    if is_groq_key_rejected(key_hash):
+        raise GroqRequestError("API error: 401. Please check your API key.")
+    headers = {
+        "Authorization": f"Bearer {groq_api_key}"
+    }
+    url = "https://api.groq.com/openai/v1/chat/completions"
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+        "stream": True
+    }
+    with groq_session.post(url, headers=headers, json=payload, timeout=GROQ_TIMEOUT, stream=True) as response:
+        record_groq_key_status(key_hash, response.status_code)
+        if response.status_code != 200:
+            logger.error("API error: %s - %s", response.status_code, response.text)
+            raise GroqRequestError(f"API error: {response.status_code}. Please check your API key.")
+        for line in response.iter_lines():
+            if not line.startswith(b"data: "):
+                continue
+            data = line[len(b"data: "):]
+            if data == b"[DONE]":
+                break
+            delta = orjson.loads(data)["choices"][0]["delta"].get("content")
+            if delta:
+                yield delta
+    logger.info("Groq API streaming request successful")
+
+def drain_groq_stream(stream, parts, stop=None, on_delta=None):
+    """
+    Appends deltas from stream_groq_request to parts until the stream ends or stop() is true.
+    Returns an error message in the same form as make_groq_request, or None.
+    """
+    try:
+        for delta in stream:
+            parts.append(delta)
+            if on_delta:
+                on_delta()
+            if stop and stop():
+                break
+    except GroqRequestError as e:
+        return str(e)
+    except requests.RequestException as e:
+        logger.error("Request error: %s", e)
+        return f"Network error: {str(e)}"
+    except Exception as e:
+        logger.error("Unexpected error: %s", e)
+        return f"Unexpected error: {str(e)}"
+    return None
+
+@st.cache_resource
+def _analysis_pool():
+    # Shared across sessions so a long analysis never blocks the script thread
+    return ThreadPoolExecutor(max_workers=4)
+
+def submit_analysis(*args, **kwargs):
+    """Runs analyze_with_groq on the background pool with this session's script context attached."""
+    ctx = get_script_run_ctx()
+
+    def run():
+        # Lets the worker read and write this session's st.session_state
+        add_script_run_ctx(ctx=ctx)
+        return analyze_with_groq(*args, **kwargs)
+
+    return _analysis_pool().submit(run)
+
+def parse_json_response(text):
+    """Decodes a model's JSON reply, tolerating surrounding whitespace and ```json fences."""
+    return orjson.loads(CODE_FENCE_RE.sub("", text).strip())
+
+def is_valid_sentiment(result):
+    return (
+        isinstance(result, dict)
+        and result.get("sentiment") in SENTIMENT_LABELS
+        and isinstance(result.get("confidence"), (int, float))
+    )
+
+def valid_actions(result):
+    """Returns the well-formed action dicts from a parsed action reply."""
+    actions = result.get("actions") if isinstance(result, dict) else None
+    if not isinstance(actions, list):
+        return []
+    return [action for action in actions if isinstance(action, dict) and action.get("action")]
+
+def chat_timestamp():
+    return datetime.now().strftime(CHAT_TIME_FORMAT)
+
+def render_chat_message(msg):
+    role_class = "user" if msg["role"] == "user" else "assistant"
+    timestamp = msg.get("timestamp", "")
+    return (
+        f'<div class="chat-message {role_class}">'
+        f'{msg["content"]}'
+        f'<div class="timestamp" style="font-size: 0.75rem; color: #888;">{timestamp}</div>'
+        f'</div>'
+    )
+
 st.set_page_config(
     page_title="Next Best Action Recommendation Engine",
     page_icon="🎯",
@@ -328,7 +546,7 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
-st.markdown(STYLES, unsafe_allow_html=True)
+st.markdown(ALL_CSS, unsafe_allow_html=True)
 
 AGENT_WELCOME_MESSAGES = {
     "TransactionAnalysisAgent": [
@@ -360,32 +578,51 @@ session_defaults = {
     'recommended_actions': [],
     'sentiment_result': {},
     'chain_of_thought': "Click 'Run AI Analysis' to start live reasoning...",
+    'chain_of_thought_log': [],
     'api_key_set': False,
     'template_loaded': False,
     'groq_api_key': "",
     'customer_chat_history': [],
     'pending_customer_message': "",
     'last_transcript': "",
-    'selected_agent': "GeneralAgent"
+    'selected_agent': "GeneralAgent",
+    'analysis_future': None,
+    'analysis_progress': (0, "Routing query..."),
+    'analysis_key': None,
+    'last_analysis_key': None
 }
 
-for key, value in session_defaults.items():
-    if key not in st.session_state:
-        st.session_state[key] = value
+# Seed once per session; Reset Analysis restores the defaults explicitly
+if "_defaults_applied" not in st.session_state:
+    st.session_state.update({key: value for key, value in session_defaults.items() if key not in st.session_state})
+    st.session_state._defaults_applied = True
+
+# Rendered HTML for each chat message, kept in step with customer_chat_history
+if "customer_chat_rendered" not in st.session_state:
+    st.session_state.customer_chat_rendered = []
+# Transcript text and how many history messages it covers, so reruns only format new messages
+if "customer_chat_transcript" not in st.session_state:
+    st.session_state.customer_chat_transcript = ("", 0)
 
 if not st.session_state.customer_chat_history:
     initial_message = AGENT_WELCOME_MESSAGES.get(st.session_state.selected_agent, AGENT_WELCOME_MESSAGES["GeneralAgent"])
     st.session_state.customer_chat_history = [
-        {"role": "assistant", "content": initial_message, "timestamp": datetime.now().strftime("%I:%M %p")}
+        {"role": "assistant", "content": initial_message, "timestamp": chat_timestamp()}
     ]
 
+@st.cache_data
+def _initial_template():
+    selected_template = DEMO_TEMPLATES[next(iter(DEMO_TEMPLATES))]
+    return selected_template["customer_data"], selected_template["travel_notice_data"], selected_template["recent_transaction"]
+
 if not st.session_state.template_loaded and DEMO_TEMPLATES:
-    first_template_key = list(DEMO_TEMPLATES.keys())[0]
-    selected_template = DEMO_TEMPLATES[first_template_key]
-    st.session_state.customer_data = selected_template["customer_data"]
-    st.session_state.travel_notice_data = selected_template["travel_notice_data"]
-    st.session_state.recent_transaction = selected_template["recent_transaction"]
-    st.session_state.template_loaded = True
+    customer_data, travel_notice_data, recent_transaction = _initial_template()
+    st.session_state.update(
+        customer_data=customer_data,
+        travel_notice_data=travel_notice_data,
+        recent_transaction=recent_transaction,
+        template_loaded=True
+    )
 
 st.markdown("<h1 class='main-header'>🎯 Next Best Action Recommendation Engine</h1>", unsafe_allow_html=True)
 st.markdown("<p class='sub-header'>Customer Support Analysis & AI-Powered Recommendation System</p>", unsafe_allow_html=True)
@@ -404,11 +641,14 @@ with st.sidebar:
     )
     st.markdown("---")
 
-st.markdown(CHAT_BOX_STYLES, unsafe_allow_html=True)
-
 # Build transcript
-transcript = "\n".join([f"{'Customer' if msg['role'] == 'user' else 'Agent'}: {msg['content']}" 
-                       for msg in st.session_state.customer_chat_history])
+transcript, transcript_count = st.session_state.customer_chat_transcript
+history = st.session_state.customer_chat_history
+if transcript_count < len(history):
+    new_lines = "\n".join(f"{TRANSCRIPT_ROLE_LABELS.get(msg['role'], 'Agent')}: {msg['content']}"
+                          for msg in history[transcript_count:])
+    transcript = f"{transcript}\n{new_lines}" if transcript_count else new_lines
+    st.session_state.customer_chat_transcript = (transcript, len(history))
 if st.session_state.pending_customer_message:
     transcript += f"\nCustomer: {st.session_state.pending_customer_message}"
 
@@ -422,19 +662,13 @@ with col1:
     st.subheader("💬 Customer Chat")
     st.markdown("Enter your customer message here and click 'Run AI Analysis' to see the reasoning process.")
     with st.container():
-        for msg in st.session_state.customer_chat_history:
-            role_class = "user" if msg["role"] == "user" else "assistant"
-            timestamp = msg.get("timestamp", "")
-            st.markdown(
-                f'<div class="chat-message {role_class}">'
-                f'{msg["content"]}'
-                f'<div class="timestamp" style="font-size: 0.75rem; color: #888;">{timestamp}</div>'
-                f'</div>',
-                unsafe_allow_html=True
-            )
+        rendered = st.session_state.customer_chat_rendered
+        # History is append-only, so only messages added since the last rerun need rendering
+        rendered.extend(render_chat_message(msg) for msg in st.session_state.customer_chat_history[len(rendered):])
+        st.markdown("".join(rendered), unsafe_allow_html=True)
     user_input = st.chat_input("Type message to Customer AI...", disabled=False)
     if user_input:
-        st.session_state.customer_chat_history.append({"role": "user", "content": user_input, "timestamp": datetime.now().strftime("%I:%M %p")})
+        st.session_state.customer_chat_history.append({"role": "user", "content": user_input, "timestamp": chat_timestamp()})
         st.session_state.pending_customer_message = user_input
         st.rerun()
 
@@ -465,55 +699,89 @@ with col2:
     )
 
 st.markdown("---")
-if st.button("🔍 Run AI Analysis", use_container_width=True):
+analysis_future = st.session_state.analysis_future
+if st.button("🔍 Run AI Analysis", use_container_width=True, disabled=analysis_future is not None):
     if not st.session_state.api_key_set or not st.session_state.groq_api_key:
         st.error("Please enter a valid Groq API key in the sidebar.")
     elif not transcript.strip() or (not any(msg["role"] == "user" for msg in st.session_state.customer_chat_history) and not st.session_state.pending_customer_message):
         st.error("No customer input provided. Please enter a message in the Customer Chat to analyze.")
+    elif (analysis_key := hashlib.blake2b(
+        orjson.dumps([
+            transcript, st.session_state.customer_data, st.session_state.travel_notice_data, rt, model_option,
+            api_key_hash(st.session_state.groq_api_key)
+        ]),
+        digest_size=16
+    ).digest()) == st.session_state.last_analysis_key:
+        st.info("Inputs unchanged — reusing cached analysis")
     else:
-        with st.spinner("Starting live AI analysis..."):
-            st.session_state.analyzed = True
-            st.session_state.last_transcript = transcript
-
-            def update_chain_of_thought(cot):
-                st.session_state.chain_of_thought = cot
-                placeholder.markdown(cot.replace("\n", "<br>"), unsafe_allow_html=True)
-
-            placeholder = st.empty()
-            progress_bar = st.progress(0)
-            sentiment_result, recommended_actions, chain_of_thought = analyze_with_groq(
-                transcript,
-                st.session_state.customer_data,
-                st.session_state.travel_notice_data,
-                rt,
-                model_option,
-                st.session_state.groq_api_key,
-                update_callback=update_chain_of_thought
-            )
-            for i in range(100):
-                time.sleep(0.03)
-                progress_bar.progress(i + 1)
+        st.session_state.analysis_key = analysis_key
+        st.session_state.analyzed = True
+        st.session_state.last_transcript = transcript
+
+        def update_chain_of_thought(cot):
+            st.session_state.chain_of_thought = cot
+
+        def update_progress(percent, text):
+            st.session_state.analysis_progress = (percent, text)
+
+        st.session_state.analysis_progress = (0, "Routing query...")
+        analysis_future = st.session_state.analysis_future = submit_analysis(
+            transcript,
+            st.session_state.customer_data,
+            st.session_state.travel_notice_data,
+            rt,
+            model_option,
+            st.session_state.groq_api_key,
+            update_callback=update_chain_of_thought,
+            progress_callback=update_progress
+        )
+
+if analysis_future is not None:
+    if analysis_future.done():
+        st.session_state.analysis_future = None
+        try:
+            sentiment_result, recommended_actions, chain_of_thought, groq_errors = analysis_future.result()
+        except Exception as e:
+            logger.error("Background analysis failed: %s", e)
+            st.error(f"Analysis failed: {str(e)}")
+        else:
             st.session_state.sentiment_result = sentiment_result or {}
             st.session_state.recommended_actions = recommended_actions or []
             st.session_state.chain_of_thought = chain_of_thought or "No reasoning provided."
-            st.success("Analysis complete! Check the Chain of Thought for detailed AI-driven routing, sentiment, actions, and reasoning.")
             st.session_state.pending_customer_message = ""
+            # A run that fell back on failed Groq calls must not make the next click look like a cache hit
+            if not groq_errors:
+                st.session_state.last_analysis_key = st.session_state.analysis_key
+            st.success("Analysis complete! Check the Chain of Thought for detailed AI-driven routing, sentiment, actions, and reasoning.")
             st.rerun()
+    else:
+        with st.status("Analyzing...", expanded=True):
+            percent, text = st.session_state.analysis_progress
+            st.progress(percent, text=text)
 
 st.header("🎯 Recommended Next Best Actions")
 actions = st.session_state.recommended_actions
 if actions:
-    for prio in ["High", "Medium", "Low"]:
-        for action in [a for a in actions if a.get("priority") == prio]:
-            with st.container():
-                st.markdown(f"""
+    # Bucket once by priority instead of re-scanning the list for each level
+    actions_by_priority = {"High": [], "Medium": [], "Low": []}
+    for action in actions:
+        bucket = actions_by_priority.get(action.get("priority"))
+        if bucket is not None:
+            bucket.append(action)
+    # One markdown element for all cards instead of one per action
+    action_cards = [
+        f"""
                 <div class="action-card">
                     <h3>{action.get('icon', '🔹')} {action.get('action', 'Action')}</h3>
                     <p>{action.get('description', '')}</p>
                     <p>Priority: <span class="priority-{action.get('priority', 'Medium').lower()}">{action.get('priority', 'Medium')}</span></p>
                     <p>Category: {action.get('category', 'General')}</p>
                 </div>
-                """, unsafe_allow_html=True)
+                """
+        for prio in ("High", "Medium", "Low")
+        for action in actions_by_priority[prio]
+    ]
+    st.markdown("".join(action_cards), unsafe_allow_html=True)
 else:
     st.warning("No recommended actions available.")
 
@@ -522,33 +790,43 @@ col1, _, col3 = st.columns(3)
 
 with col1:
     if st.button("💾 Download Analysis", use_container_width=True):
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"nba_analysis_{timestamp}.json"
+        # Capture one instant so the filename and payload timestamp agree
+        now = datetime.now()
+        filename = f"nba_analysis_{now.strftime('%Y%m%d_%H%M%S')}.json"
         analysis_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": now.isoformat(),
             "customer_data": st.session_state.customer_data,
             "recent_transaction": st.session_state.recent_transaction,
             "travel_notice_data": st.session_state.travel_notice_data,
             "sentiment_result": st.session_state.sentiment_result,
             "recommended_actions": st.session_state.recommended_actions,
-            "chain_of_thought": st.session_state.chain_of_thought
+            "chain_of_thought": st.session_state.chain_of_thought,
+            "log": st.session_state.chain_of_thought_log
         }
         st.download_button(
             label="Download Analysis JSON",
-            data=json.dumps(analysis_data, indent=2),
+            data=orjson.dumps(analysis_data, option=orjson.OPT_INDENT_2),
             file_name=filename,
             mime="application/json",
             use_container_width=True
         )
 
 with col3:
-    if st.button("🔄 Reset Analysis", use_container_width=True):
+    # The running worker still writes to this session, so Reset waits for it like Run does
+    if st.button("🔄 Reset Analysis", use_container_width=True, disabled=st.session_state.analysis_future is not None):
         for key in session_defaults.keys():
             st.session_state[key] = session_defaults[key]
         initial_message = AGENT_WELCOME_MESSAGES.get(st.session_state.selected_agent, AGENT_WELCOME_MESSAGES["GeneralAgent"])
         st.session_state.customer_chat_history = [
-            {"role": "assistant", "content": initial_message, "timestamp": datetime.now().strftime("%I:%M %p")}
+            {"role": "assistant", "content": initial_message, "timestamp": chat_timestamp()}
         ]
+        st.session_state.customer_chat_rendered = []
+        st.session_state.customer_chat_transcript = ("", 0)
         st.rerun()
 
-st.caption("Next Best Action Recommendation Engine - Enterprise v2.0")
\ No newline at end of file
+st.caption("Next Best Action Recommendation Engine - Enterprise v2.0")
+
+# Keep polling while the analysis runs; any widget interaction simply starts the next rerun sooner
+if st.session_state.analysis_future is not None:
+    time.sleep(ANALYSIS_POLL_INTERVAL)
+    st.rerun()
\ No newline at end of file
@@ -1,24 +1,150 @@
 from typing import Dict, List, Any, Optional, Tuple
+from collections import defaultdict
+from functools import lru_cache
 import datetime
 import re
-import json
+import os
 import logging
 
 # Use the same logger as sai.py and agent_router.py
 logger = logging.getLogger('ChainOfThought')
 
+# Set AGENT_REASONING=0 in deployments that never show the reasoning log to skip recording it
+RECORD_TRACE = os.getenv("AGENT_REASONING", "1") != "0"
+
+
+def _keyword_pattern(keywords):
+    # One word-bounded alternation per keyword list; longest first so multi-word keywords win
+    return re.compile(r'\b(' + '|'.join(map(re.escape, sorted(keywords, key=len, reverse=True))) + r')\b')
+
+LOCATION_KEYWORDS = (
+    "japan", "tokyo", "osaka",
+    "germany", "berlin", "munich",
+    "spain", "barcelona", "madrid",
+    "france", "paris", "nice",
+    "italy", "rome", "milan",
+    "usa", "us", "united states",
+    "uk", "united kingdom", "london",
+)
+MERCHANT_KEYWORDS = (
+    "starbucks", "tokyo central", "market", "uber", "lyft", "la casa",
+    "tapas", "amazon", "marketplace", "target", "walmart", "cvs",
+    "walgreens", "best buy", "home depot", "costco", "safeway",
+    "whole foods",
+    "delta", "united airlines", "marriott", "hilton", "ebay"
+)
+COUNTRY_KEYWORDS = LOCATION_KEYWORDS + ("america", "england", "scotland", "canada", "mexico", "australia")
+COUNTRY_ALIASES = {
+    "usa": "USA", "us": "USA", "united states": "USA", "america": "USA",
+    "uk": "UK", "united kingdom": "UK", "england": "UK", "scotland": "UK",
+}
+
+LOCATION_RE = _keyword_pattern(LOCATION_KEYWORDS)
+MERCHANT_RE = _keyword_pattern(MERCHANT_KEYWORDS)
+COUNTRY_RE = _keyword_pattern(COUNTRY_KEYWORDS)
+# Intent patterns are matched against the prompt lowercased once per process() call
+DECLINE_RE = re.compile(r"\b(decline[d]?|denied|rejected|failed)\b")
+GENERAL_TRANSACTION_RE = re.compile(r"\b(transaction[s]?|purchase[s]?|charge[s]?|payment[s]?)\b")
+TRAVEL_ACTIVATE_RE = re.compile(r"\b(activate|fix|enable|reactivate|confirm it[']?s active)\b")
+TRAVEL_CREATE_RE = re.compile(r"\b(create|set up|new|add.*notice|submit.*notice|inform.*travel|going to)\b")
+TRAVEL_EDIT_RE = re.compile(r"\b(update|change|modify|edit)\b")
+TRAVEL_UPDATE_RE = re.compile(r"\b(update|change|modify|edit|add countries|remove countries|extend|shorten)\b")
+# Card intents in one pass: the lookahead reports every position where an intent keyword starts, so a
+# long match such as 'max.*spend' cannot swallow a higher-priority keyword; groups are in priority order
+CARD_INTENT_RE = re.compile(
+    r"(?=\b(?:"
+    r"(?P<report_lost_stolen>lost|stolen|missing|can'?t find my card|someone took my card)"
+    r"|(?P<replace_card>replace|replacement|new card|damaged|broken|expired|expiring soon)"
+    r"|(?P<card_limits>limit[s]?|spending limit|how much can i spend|withdrawal limit|max.*spend|max.*withdraw)"
+    r"|(?P<card_status>status|active|inactive|frozen|blocked|is my card working)"
+    r")\b)"
+)
+CARD_INTENT_PRIORITY = ("report_lost_stolen", "replace_card", "card_limits", "card_status")
+INQUIRY_BALANCE_RE = re.compile(r"\b(balance|how much.*in my account|funds available|account total)\b")
+INQUIRY_CONTACT_RE = re.compile(r"\b(contact|email|phone|text|sms|notification|preferences|how.*contact me)\b")
+INQUIRY_OVERVIEW_RE = re.compile(r"\b(overview|summary|account details|my account|information.*account)\b")
+INQUIRY_OVERVIEW_GUARD_RE = re.compile(r"\b(balance|contact|travel|transaction|card)\b")
+INQUIRY_HELP_RE = re.compile(r"\b(help|support|question|assist|can you)\b")
+INQUIRY_TOPIC_RE = re.compile(r"\b(balance|contact|overview|travel|transaction|card)\b")
+# Lowercased forms of every name the extractors can return, used to index transactions up front
+LOCATION_NAMES = frozenset(COUNTRY_ALIASES.get(location, location).lower() for location in LOCATION_KEYWORDS)
+
+# Country names matched as substrings of a transaction's location, in lookup order
+KNOWN_COUNTRIES = ("japan", "germany", "spain", "usa", "france", "italy", "uk")
+INTERNATIONAL_COUNTRIES = ("japan", "germany", "spain", "france", "italy")
+# Card services also counts the UK when blaming declines on a travel notice issue
+CARD_INTERNATIONAL_COUNTRIES = frozenset(INTERNATIONAL_COUNTRIES + ("uk",))
+
+# Decline reason substrings mapped to a category; earlier entries win when a reason matches several
+DECLINE_REASON_CATEGORIES = {
+    "insufficient funds": "insufficient_funds",
+    "card reported lost": "lost_card",
+    "incorrect pin": "bad_pin",
+    "pin attempts exceeded": "bad_pin",
+    "travel notice": "travel",
+    "unusual activity": "travel",
+    "security block": "travel",
+}
+DECLINE_REASON_RE = re.compile("|".join(map(re.escape, DECLINE_REASON_CATEGORIES)))
+_DECLINE_REASON_PRIORITY = {reason: i for i, reason in enumerate(DECLINE_REASON_CATEGORIES)}
+
+# Categories with a fixed explanation: category -> (response text, next best actions)
+DECLINE_REASON_RESPONSES = {
+    "insufficient_funds": (
+        " This often happens if the account balance wasn't enough at the moment of the purchase.",
+        (
+            ("Set Balance Alerts", "Medium", "Suggest setting up low balance alerts to help avoid this in the future.", "Account Management", "💰"),
+            ("Check Available Balance", "Medium", "Offer to check the current available balance.", "Account Management", "📊"),
+        ),
+    ),
+    "lost_card": (
+        " This was because the card used was marked as lost or stolen in our system. If you have found this card, we need to reactivate it or issue a new one.",
+        (
+            ("Review Card Status", "High", "Verify if the customer's card needs reactivation or replacement.", "Card Services", "💳"),
+            ("Issue Replacement Card", "High", "Offer to immediately issue a replacement card.", "Card Services", "🆕"),
+        ),
+    ),
+    "bad_pin": (
+        " The decline was due to an incorrect PIN entry. If you've forgotten your PIN, I can help you reset it.",
+        (
+            ("Reset PIN", "High", "Offer to guide the customer through the PIN reset process.", "Card Services", "🔑"),
+        ),
+    ),
+}
+
+# Next best actions offered by more than one card-services or inquiry branch
+ORDER_REPLACEMENT_CARD_ACTION = ("Order Replacement Card", "High", "Initiate the process to order a replacement for the lost card.", "Card Services", "🆕")
+REVIEW_DECLINED_TRANSACTIONS_ACTION = ("Review Declined Transactions", "Medium", "Offer to investigate the recent declined transactions.", "Transaction Analysis", "📉")
+
+def _decline_category(reason_lower: str) -> Optional[str]:
+    """Classify a lowercased decline reason in one scan; None when no known reason matches"""
+    matches = DECLINE_REASON_RE.findall(reason_lower)
+    if not matches:
+        return None
+    return DECLINE_REASON_CATEGORIES[min(matches, key=_DECLINE_REASON_PRIORITY.__getitem__)]
+
+@lru_cache(maxsize=64)
+def _parse_notice_date(date_str: str) -> datetime.date:
+    """Parse a travel-notice date like 'May 5, 2023'; the same few notice dates are parsed on every prompt"""
+    return datetime.datetime.strptime(date_str, "%B %d, %Y").date()
+
+def _skip_trace(*args, **kwargs):
+    pass
+
+
 class BaseAgent:
     """
     Base class for all specialized agents.
     Includes methods to log reasoning steps during processing.
     """
 
-    def __init__(self, customer_data: Dict, travel_notice_data: Dict, recent_transactions: List[Dict]):
+    def __init__(self, customer_data: Dict, travel_notice_data: Dict, recent_transactions: List[Dict], record_trace: bool = True):
         self.customer_data = customer_data
         self.travel_notice_data = travel_notice_data
         self.recent_transactions = recent_transactions
+        self._name = type(self).__name__
         self.reasoning_log = {
-            "agent_type": self.__class__.__name__,
+            "agent_type": self._name,
             "analysis_steps": [],
             "decision_factors": {},
             "actions_considered": [],
@@ -26,7 +152,29 @@ class BaseAgent:
             "response_construction": "",
             "next_best_actions": []
         }
-        logger.info("%s initialized", self.__class__.__name__)
+        # The helpers below run dozens of times per prompt, so they append to these aliases directly
+        self._analysis_steps = self.reasoning_log["analysis_steps"]
+        self._decision_factors = self.reasoning_log["decision_factors"]
+        self._actions_considered = self.reasoning_log["actions_considered"]
+        self._actions_taken = self.reasoning_log["actions_taken"]
+        self._next_best_actions = self.reasoning_log["next_best_actions"]
+        # Everything below depends only on the constructor inputs, so it is derived once rather than per prompt
+        # Lowercased transaction fields, kept parallel to recent_transactions
+        self._tx_locations = [tx.get("location", "").lower() for tx in recent_transactions]
+        self._tx_reasons = [tx.get("reason", "").lower() for tx in recent_transactions]
+        declined = [i for i, tx in enumerate(recent_transactions) if tx.get("status", "").lower() == "declined"]
+        self._declined_transactions = [recent_transactions[i] for i in declined]
+        self._declined_locations = [self._tx_locations[i] for i in declined]
+        self._declined_reasons = [self._tx_reasons[i] for i in declined]
+        self._card_reported_lost = any("card reported lost" in reason or "stolen" in reason for reason in self._tx_reasons)
+        self._notice_countries = frozenset(c.lower() for c in (travel_notice_data or {}).get("countries", []))
+        notice_status = (travel_notice_data or {}).get("status", "").lower()
+        self._travel_notice_issue = "error" in notice_status or "not activated" in notice_status
+        if not record_trace:
+            # Callers that never read the reasoning log skip the bookkeeping; next best actions are still recorded
+            self._add_analysis_step = self._add_decision_factor = self._consider_action = _skip_trace
+            self._take_action = self._set_response_construction = _skip_trace
+        logger.info("%s initialized", self._name)
 
     def process(self, user_prompt: str) -> Dict:
         """
@@ -35,60 +183,76 @@ class BaseAgent:
         """
         raise NotImplementedError("Subclasses must implement process method")
 
+    def _build_result(self, response: str) -> Dict:
+        """Package the final response with the reasoning log; shared by every agent's process()"""
+        logger.info("%s completed processing", self._name)
+        return {
+            "response": response.strip(),
+            "reasoning_log": self.reasoning_log,
+            "next_best_actions": self._next_best_actions
+        }
+
     def _add_analysis_step(self, step_description: str):
         """Add a step to the reasoning log"""
-        self.reasoning_log["analysis_steps"].append(step_description)
-        logger.debug("%s - Analysis step: %s", self.__class__.__name__, step_description)
+        self._analysis_steps.append(step_description)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s - Analysis step: %s", self._name, step_description)
 
     def _add_decision_factor(self, factor: str, value: Any):
         """Add a decision factor to the reasoning log"""
         if isinstance(value, (datetime.date, datetime.datetime)):
             value = value.isoformat()
-        self.reasoning_log["decision_factors"][factor] = value
-        logger.debug("%s - Decision factor: %s = %s", self.__class__.__name__, factor, value)
+        self._decision_factors[factor] = value
+        if logger.isEnabledFor(logging.DEBUG):
+            if isinstance(value, list) and value and isinstance(value[0], dict):
+                # Transaction lists are summarized; the full value is still in the reasoning log
+                logger.debug("%s - Decision factor: %s = %d item(s)", self._name, factor, len(value))
+            else:
+                logger.debug("%s - Decision factor: %s = %s", self._name, factor, value)
 
     def _consider_action(self, action: str, reason: str):
         """Add an action under consideration to the reasoning log"""
-        self.reasoning_log["actions_considered"].append({"action": action, "reason": reason})
-        logger.debug("%s - Considered action: %s (Reason: %s)", self.__class__.__name__, action, reason)
+        self._actions_considered.append({"action": action, "reason": reason})
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s - Considered action: %s (Reason: %s)", self._name, action, reason)
 
     def _take_action(self, action: str, details: str):
         """Add an action taken to the reasoning log"""
-        self.reasoning_log["actions_taken"].append({"action": action, "details": details})
-        logger.info("%s - Action taken: %s - %s", self.__class__.__name__, action, details)
+        self._actions_taken.append({"action": action, "details": details})
+        logger.info("%s - Action taken: %s - %s", self._name, action, details)
 
     def _set_response_construction(self, explanation: str):
         """Set the response construction reasoning"""
         self.reasoning_log["response_construction"] = explanation
-        logger.debug("%s - Response construction: %s", self.__class__.__name__, explanation)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s - Response construction: %s", self._name, explanation)
 
     def _add_next_best_action(self, action: str, priority: str, description: str, category: str, icon: str = '🔹'):
         """Add a next best action recommendation"""
-        if "next_best_actions" not in self.reasoning_log:
-            self.reasoning_log["next_best_actions"] = []
-        self.reasoning_log["next_best_actions"].append({
+        self._next_best_actions.append({
             "action": action,
             "priority": priority,
             "description": description,
             "category": category,
             "icon": icon
         })
-        logger.info("%s - Added next best action: %s (Priority: %s, Category: %s)", 
-                    self.__class__.__name__, action, priority, category)
+        logger.info("%s - Added next best action: %s (Priority: %s, Category: %s)",
+                    self._name, action, priority, category)
 
 
 class TransactionAnalysisAgent(BaseAgent):
     """Agent specializing in transaction analysis and resolution"""
 
     def process(self, user_prompt: str) -> Dict:
-        logger.info("%s processing prompt: %s", self.__class__.__name__, user_prompt)
+        logger.info("%s processing prompt: %s", self._name, user_prompt)
         self._add_analysis_step("Initializing TransactionAnalysisAgent")
         self._add_analysis_step(f"Received user prompt: '{user_prompt}'")
 
         # Extract relevant transaction mentions
         self._add_analysis_step("Identifying specific transaction details (locations, merchants) mentioned in the query")
-        mentioned_locations = self._extract_locations(user_prompt)
-        mentioned_merchants = self._extract_merchants(user_prompt)
+        prompt_lower = user_prompt.lower()
+        mentioned_locations = self._extract_locations(prompt_lower)
+        mentioned_merchants = self._extract_merchants(prompt_lower)
         mentioned_explicitly = bool(mentioned_locations or mentioned_merchants)
 
         self._add_decision_factor("mentioned_locations", mentioned_locations)
@@ -100,19 +264,22 @@ class TransactionAnalysisAgent(BaseAgent):
         relevant_transactions = []
 
         if mentioned_explicitly:
-            for tx in self.recent_transactions:
-                location_match = any(loc.lower() in tx.get("location", "").lower() for loc in mentioned_locations)
-                merchant_match = any(merch.lower() in tx.get("merchant", "").lower() for merch in mentioned_merchants)
-                if location_match or merchant_match:
-                    relevant_transactions.append(tx)
+            # Only prompts that name a place or merchant need the index, so it is built here rather than per agent
+            location_index, merchant_index = self._index_transactions()
+            matched = set()
+            for loc in mentioned_locations:
+                matched |= location_index.get(loc.lower(), set())
+            for merch in mentioned_merchants:
+                matched |= merchant_index.get(merch, set())
+            relevant_transactions = [self.recent_transactions[i] for i in sorted(matched)]
             self._add_analysis_step(f"Found {len(relevant_transactions)} transactions matching explicit mentions.")
 
-        is_decline_focused = re.search(r"\b(decline[d]?|denied|rejected|failed)\b", user_prompt, re.IGNORECASE)
-        is_general_transaction_query = re.search(r"\b(transaction[s]?|purchase[s]?|charge[s]?|payment[s]?)\b", user_prompt, re.IGNORECASE) and not mentioned_explicitly
+        is_decline_focused = DECLINE_RE.search(prompt_lower)
+        is_general_transaction_query = GENERAL_TRANSACTION_RE.search(prompt_lower) and not mentioned_explicitly
 
         if not relevant_transactions and is_decline_focused:
             self._add_analysis_step("No specific transaction match found, but user mentioned 'declined'. Searching for all recent declined transactions.")
-            relevant_transactions = [tx for tx in self.recent_transactions if tx.get("status", "").lower() == "declined"]
+            relevant_transactions = self._declined_transactions
             self._add_decision_factor("search_mode", "all_declined")
             self._add_analysis_step(f"Found {len(relevant_transactions)} declined transactions.")
 
@@ -148,48 +315,21 @@ class TransactionAnalysisAgent(BaseAgent):
                 response = f"I looked into the transaction you mentioned. The purchase of {tx.get('amount')} at {tx.get('merchant')} in {tx.get('location')} on {tx.get('date')} was declined because '{tx.get('reason')}'."
 
                 reason_lower = tx.get('reason', '').lower()
-                if "insufficient funds" in reason_lower:
-                    response += " This often happens if the account balance wasn't enough at the moment of the purchase."
-                    self._add_next_best_action(
-                        "Set Balance Alerts", "Medium",
-                        "Suggest setting up low balance alerts to help avoid this in the future.",
-                        "Account Management", "💰"
-                    )
-                    self._add_next_best_action(
-                        "Check Available Balance", "Medium",
-                        "Offer to check the current available balance.",
-                        "Account Management", "📊"
-                    )
-
-                elif "card reported lost" in reason_lower:
-                    response += " This was because the card used was marked as lost or stolen in our system. If you have found this card, we need to reactivate it or issue a new one."
-                    self._add_next_best_action(
-                        "Review Card Status", "High",
-                        "Verify if the customer's card needs reactivation or replacement.",
-                        "Card Services", "💳"
-                    )
-                    self._add_next_best_action(
-                        "Issue Replacement Card", "High",
-                        "Offer to immediately issue a replacement card.",
-                        "Card Services", "🆕"
-                    )
-
-                elif "incorrect pin" in reason_lower or "pin attempts exceeded" in reason_lower:
-                    response += " The decline was due to an incorrect PIN entry. If you've forgotten your PIN, I can help you reset it."
-                    self._add_next_best_action(
-                        "Reset PIN", "High",
-                        "Offer to guide the customer through the PIN reset process.",
-                        "Card Services", "🔑"
-                    )
-
-                elif "travel notice" in reason_lower or "unusual activity" in reason_lower or "security block" in reason_lower:
+                reason_category = _decline_category(reason_lower)
+                self._add_decision_factor("decline_reason_category", reason_category)
+                if reason_category in DECLINE_REASON_RESPONSES:
+                    reason_response, reason_actions = DECLINE_REASON_RESPONSES[reason_category]
+                    response += reason_response
+                    for next_best_action in reason_actions:
+                        self._add_next_best_action(*next_best_action)
+
+                elif reason_category == "travel":
                     location = tx.get('location', '').lower()
-                    is_international = any(loc in location for loc in ["japan", "germany", "spain", "france", "italy"])
+                    is_international = any(loc in location for loc in INTERNATIONAL_COUNTRIES)
 
                     if is_international:
                         response += f" This decline appears to be related to international usage in {tx.get('location', 'that location')}. Often, setting a travel notice helps prevent this."
-                        notice_countries = [c.lower() for c in self.travel_notice_data.get("countries", [])]
-                        notice_covers_location = any(loc in location for loc in notice_countries)
+                        notice_covers_location = any(loc in location for loc in self._notice_countries)
 
                         if not self.travel_notice_data or not notice_covers_location:
                             response += " I don't see an active travel notice covering this location."
@@ -306,79 +446,47 @@ class TransactionAnalysisAgent(BaseAgent):
                     "Account Management", "🗓️"
                 )
 
-        logger.info("%s completed processing", self.__class__.__name__)
-        return {
-            "response": response.strip(),
-            "reasoning_log": self.reasoning_log,
-            "next_best_actions": self.reasoning_log.get("next_best_actions", [])
-        }
-
-    def _extract_locations(self, user_prompt: str) -> List[str]:
-        """Extract mentioned locations from the user prompt using regex for robustness"""
-        logger.debug("%s extracting locations from prompt", self.__class__.__name__)
-        locations = []
-        prompt_lower = user_prompt.lower()
-
-        location_keywords = [
-            "japan", "tokyo", "osaka",
-            "germany", "berlin", "munich",
-            "spain", "barcelona", "madrid",
-            "france", "paris", "nice",
-            "italy", "rome", "milan",
-            "usa", "us", "united states",
-            "uk", "united kingdom", "london",
-        ]
-
-        for location in location_keywords:
-            if re.search(r'\b' + re.escape(location) + r'\b', prompt_lower):
-                if location in ["usa", "us", "united states"]:
-                    normalized_location = "USA"
-                elif location in ["uk", "united kingdom"]:
-                    normalized_location = "UK"
-                else:
-                    normalized_location = location.title()
-
-                if normalized_location not in locations:
-                    locations.append(normalized_location)
-
-        return locations
-
-    def _extract_merchants(self, user_prompt: str) -> List[str]:
-        """Extract mentioned merchants from the user prompt using regex"""
-        logger.debug("%s extracting merchants from prompt", self.__class__.__name__)
-        merchants = []
-        prompt_lower = user_prompt.lower()
-
-        merchant_keywords = [
-            "starbucks", "tokyo central", "market", "uber", "lyft", "la casa",
-            "tapas", "amazon", "marketplace", "target", "walmart", "cvs",
-            "walgreens", "best buy", "home depot", "costco", "safeway",
-            "whole foods",
-            "delta", "united airlines", "marriott", "hilton", "ebay"
-        ]
-
-        for merchant in merchant_keywords:
-            escaped_merchant = re.escape(merchant)
-            if re.search(r'\b' + escaped_merchant + r'\b', prompt_lower):
-                if merchant not in merchants:
-                    merchants.append(merchant)
-
-        return merchants
+        return self._build_result(response)
+
+    def _index_transactions(self) -> Tuple[Dict[str, set], Dict[str, set]]:
+        """Map each known location/merchant keyword to the indices of transactions that mention it"""
+        location_index, merchant_index = defaultdict(set), defaultdict(set)
+        for i, (tx, location) in enumerate(zip(self.recent_transactions, self._tx_locations)):
+            merchant = tx.get("merchant", "").lower()
+            for name in LOCATION_NAMES:
+                if name in location:
+                    location_index[name].add(i)
+            for name in MERCHANT_KEYWORDS:
+                if name in merchant:
+                    merchant_index[name].add(i)
+        return location_index, merchant_index
+
+    def _extract_locations(self, prompt_lower: str) -> List[str]:
+        """Extract mentioned locations from the lowercased user prompt using regex for robustness"""
+        logger.debug("%s extracting locations from prompt", self._name)
+        matches = LOCATION_RE.findall(prompt_lower)
+        return list(dict.fromkeys(COUNTRY_ALIASES.get(location, location.title()) for location in matches))
+
+    def _extract_merchants(self, prompt_lower: str) -> List[str]:
+        """Extract mentioned merchants from the lowercased user prompt using regex"""
+        logger.debug("%s extracting merchants from prompt", self._name)
+        return list(dict.fromkeys(MERCHANT_RE.findall(prompt_lower)))
 
 
 class TravelNoticeAgent(BaseAgent):
     """Agent specializing in travel notices and international transactions"""
 
     def process(self, user_prompt: str) -> Dict:
-        logger.info("%s processing prompt: %s", self.__class__.__name__, user_prompt)
+        logger.info("%s processing prompt: %s", self._name, user_prompt)
         self._add_analysis_step("Initializing TravelNoticeAgent")
         self._add_analysis_step(f"Received user prompt: '{user_prompt}'")
 
-        intent = self._determine_intent(user_prompt)
+        prompt_lower = user_prompt.lower()
+        intent = self._determine_intent(prompt_lower)
         self._add_decision_factor("determined_intent", intent)
         self._add_analysis_step(f"Determined user intent: {intent}")
 
-        mentioned_countries = self._extract_countries(user_prompt)
+        mentioned_countries = self._extract_countries(prompt_lower)
         self._add_decision_factor("mentioned_countries", mentioned_countries)
         self._add_analysis_step(f"Extracted countries from prompt: {mentioned_countries}")
 
@@ -387,266 +495,250 @@ class TravelNoticeAgent(BaseAgent):
         self._add_decision_factor("current_notice_details", notice_details)
         self._add_analysis_step(f"Checked for active travel notice. Active: {active_notice}, Details: {notice_details}")
 
-        response = ""
-        needs_activation_fix = active_notice and notice_details.get('status') == "Submitted but not activated due to system error"
-
-        if intent == "check_status":
-            self._add_analysis_step("Handling 'check_status' intent.")
-            self._consider_action("Provide current travel notice status", "User asked about existing travel notice.")
+        needs_activation_fix = active_notice and notice_details.get('status', '') == "Submitted but not activated due to system error"
 
-            if active_notice:
-                self._take_action("Travel Notice Status Report", f"Provided details about active notice for {notice_details.get('countries')}.")
-                self._set_response_construction("Informing user about active travel notice details.")
-                response = f"You currently have an active travel notice set for {', '.join(notice_details.get('countries', []))} from {notice_details.get('travel_start', 'N/A')} to {notice_details.get('travel_end', 'N/A')}."
+        self._add_analysis_step(f"Handling '{intent}' intent.")
+        response = self._INTENT_HANDLERS[intent](self, active_notice, notice_details, mentioned_countries, needs_activation_fix)
+        # The activation handler may have flipped the notice to Active
+        notice_status = notice_details.get('status', '')
 
-                if needs_activation_fix:
-                    response += " However, I see it wasn't activated correctly due to a system issue."
-                    self._add_next_best_action(
-                        "Fix & Activate Notice", "High",
-                        "Immediately fix the system error and activate the pending travel notice.",
-                        "Travel Services", "🛠️"
-                    )
-                    response += " I can fix that for you right now."
-                else:
-                    response += " Your card should work as expected in these locations during this period."
-                    self._add_next_best_action(
-                        "View Notice Details", "Low",
-                        "Offer to show the full details of the active travel notice.",
-                        "Travel Services", "📄"
-                    )
+        self._add_analysis_step("Performing post-intent analysis: Checking for transaction/notice mismatches.")
+        mismatch_found = False
+        # No declined transactions means no mismatch is possible, so the scan is skipped entirely
+        if active_notice and self._declined_transactions and notice_status.lower() == 'active':
+            countries_with_declines_outside_notice = set()
 
-            else:
-                self._take_action("Travel Notice Status Report", "Informed user no active notice found.")
-                self._set_response_construction("Informing user they have no active travel notice.")
-                response = "It looks like you don't have any active travel notices set up right now."
-                self._add_next_best_action(
-                    "Create Travel Notice", "Medium",
-                    "Offer to help create a new travel notice for an upcoming trip.",
-                    "Travel Services", "➕"
-                )
-                response += " Are you planning a trip? I can help you set one up."
+            for location, reason in zip(self._declined_locations, self._declined_reasons):
+                tx_country = next((country for country in KNOWN_COUNTRIES if country in location), None)
 
-        elif intent == "create_notice":
-            self._add_analysis_step("Handling 'create_notice' intent.")
-            self._consider_action("Set up new travel notice", "User expressed intent to create a travel plan/notice.")
+                if tx_country and tx_country not in self._notice_countries:
+                    if "travel" in reason or "location" in reason or "security block" in reason or "unusual activity" in reason:
+                        countries_with_declines_outside_notice.add(tx_country.title())
+                        mismatch_found = True
 
-            if active_notice:
-                self._take_action("Create Notice Halted", "User already has an active notice.")
-                self._set_response_construction("Informing about existing notice and offering to update it instead.")
-                response = f"You already have a travel notice active for {', '.join(notice_details.get('countries', []))} (until {notice_details.get('travel_end', 'N/A')}). Did you want to update this existing notice, perhaps add more countries or change the dates?"
+            if countries_with_declines_outside_notice:
+                self._add_analysis_step(f"Found declined transactions in countries not covered by the active notice: {countries_with_declines_outside_notice}")
                 self._add_next_best_action(
-                    "Update Existing Notice", "Medium",
-                    "Offer to modify the current travel notice instead of creating a new one.",
-                    "Travel Services", "✏️"
+                    "Add Country to Notice", "High",
+                    f"Suggest adding {', '.join(countries_with_declines_outside_notice)} to the travel notice due to recent declines.",
+                    "Travel Services", "🌍"
                 )
-                self._add_next_best_action(
-                    "Cancel Existing Notice", "Low",
-                    "Offer to cancel the current notice if it's no longer needed.",
-                    "Travel Services", "❌"
+                mismatch_note = (
+                    f"I noticed you had recent declined transactions in {', '.join(countries_with_declines_outside_notice)}, "
+                    "which aren't currently covered by your active travel notice. "
+                    "Adding these countries could prevent future declines there. Would you like to do that?"
                 )
-            else:
-                self._take_action("New Travel Notice Creation Initiated", "Guiding user through the creation process.")
-                self._set_response_construction("Guiding user through creating a new travel notice, prompting for necessary details.")
-                response = "Okay, I can help you set up a new travel notice. To do this, I'll need a few details:"
-                response += "\n- Which countries will you be visiting?"
-                response += "\n- What is the start date of your trip?"
-                response += "\n- What is the end date of your trip?"
-
-                if mentioned_countries:
-                    response += f"\n\nYou mentioned {', '.join(mentioned_countries)}. Shall I include these in the notice?"
-                    self._add_next_best_action(
-                        "Confirm Countries for Notice", "High",
-                        f"Ask user to confirm adding {', '.join(mentioned_countries)} to the new notice.",
-                        "Travel Services", "✅"
-                    )
-                else:
-                    self._add_next_best_action(
-                        "Provide Travel Details", "High",
-                        "Prompt user to provide countries, start date, and end date.",
-                        "Travel Services", "❓"
-                    )
-
-        elif intent == "update_notice":
-            self._add_analysis_step("Handling 'update_notice' intent.")
-            self._consider_action("Update existing travel notice", "User expressed intent to modify their travel notice.")
-
-            if active_notice:
-                self._take_action("Travel Notice Update Initiated", f"Offering to update notice for {notice_details.get('countries')}.")
-                self._set_response_construction("Guiding user through updating their existing notice, asking what needs changing.")
-                response = f"Sure, I can help update your current travel notice (for {', '.join(notice_details.get('countries', []))}, valid until {notice_details.get('travel_end', 'N/A')}). What would you like to change? You can add/remove countries or adjust the travel dates."
+                if response and not response.endswith("?"):
+                    response = f"{response}\n\n**Additionally:** {mismatch_note}"
+                elif not response:
+                    response = mismatch_note
 
-                not_included = [country for country in mentioned_countries if country not in notice_details.get('countries', [])]
-                already_included = [country for country in mentioned_countries if country in notice_details.get('countries', [])]
+        if not mismatch_found:
+            self._add_analysis_step("No transaction/notice mismatches found requiring immediate action.")
 
-                if not_included:
-                    response += f"\n\nI see you mentioned {', '.join(not_included)}. Would you like to add them to the notice?"
-                    self._add_next_best_action(
-                        "Add Countries to Notice", "Medium",
-                        f"Offer to add {', '.join(not_included)} to the existing travel notice.",
-                        "Travel Services", "➕"
-                    )
-                elif already_included:
-                    response += f"\n\nYou mentioned {', '.join(already_included)}, which are already included. Did you want to change the travel dates associated with this notice?"
-                    self._add_next_best_action(
-                        "Update Travel Dates", "Medium",
-                        "Ask user if they want to modify the start or end dates for the notice.",
-                        "Travel Services", "📅"
-                    )
-                else:
-                    self._add_next_best_action(
-                        "Specify Notice Changes", "High",
-                        "Ask the user to specify what they want to change (countries or dates).",
-                        "Travel Services", "❓"
-                    )
+        return self._build_result(response)
 
-            else:
-                self._take_action("Update Notice Halted", "No active notice found to update.")
-                self._set_response_construction("No active notice to update, offering to create a new one instead.")
-                response = "It looks like you don't have an active travel notice to update right now. Would you like to create a new one for an upcoming trip instead?"
-                self._add_next_best_action(
-                    "Create Travel Notice", "Medium",
-                    "Guide customer through creating a new travel notice since none exists to update.",
-                    "Travel Services", "➕"
-                )
+    def _handle_check_status(self, active_notice: bool, notice_details: Dict, mentioned_countries: List[str], needs_activation_fix: bool) -> str:
+        self._consider_action("Provide current travel notice status", "User asked about existing travel notice.")
 
-        elif intent == "activate_notice":
-            self._add_analysis_step("Handling 'activate_notice' intent.")
-            self._consider_action("Activate pending/faulty travel notice", "User specifically asked to activate or fix their notice.")
+        if active_notice:
+            self._take_action("Travel Notice Status Report", f"Provided details about active notice for {notice_details.get('countries')}.")
+            self._set_response_construction("Informing user about active travel notice details.")
+            response = f"You currently have an active travel notice set for {', '.join(notice_details.get('countries', []))} from {notice_details.get('travel_start', 'N/A')} to {notice_details.get('travel_end', 'N/A')}."
 
             if needs_activation_fix:
-                self._take_action("Travel Notice Activation (Fix)", "Fixed system error and activated the travel notice.")
-                self._set_response_construction("Confirming notice activation after fixing the system error and apologizing.")
-                self.travel_notice_data['status'] = 'Active'
-                notice_details['status'] = 'Active'
-
-                response = "I found the issue! There was a system glitch preventing your notice from activating properly. I've fixed that now."
-                response += f"\nYour travel notice for {', '.join(notice_details.get('countries', []))} (from {notice_details.get('travel_start', 'N/A')} to {notice_details.get('travel_end', 'N/A')}) is now **active**. "
-                response += "Apologies for that error. Your card should now work correctly in those locations."
-
+                response += " However, I see it wasn't activated correctly due to a system issue."
                 self._add_next_best_action(
-                    "Confirm Recent Declines Resolved", "High",
-                    "Ask if the customer experienced any declines recently that should now be resolved.",
-                    "Card Services", "👍"
+                    "Fix & Activate Notice", "High",
+                    "Immediately fix the system error and activate the pending travel notice.",
+                    "Travel Services", "🛠️"
                 )
-            elif active_notice:
-                self._take_action("Activation Check Complete", "Notice already active.")
-                self._set_response_construction("Informing user that their travel notice is already active.")
-                response = f"Good news! Your travel notice for {', '.join(notice_details.get('countries', []))} is already active and runs until {notice_details.get('travel_end', 'N/A')}. No further action needed on activation."
+                response += " I can fix that for you right now."
             else:
-                self._take_action("Activation Halted", "No notice found to activate.")
-                self._set_response_construction("No notice found to activate, offering to create one.")
-                response = "I couldn't find a pending travel notice to activate. Do you need help setting up a new travel notice for a trip?"
+                response += " Your card should work as expected in these locations during this period."
                 self._add_next_best_action(
-                    "Create Travel Notice", "Medium",
-                    "Guide customer through creating a new travel notice as none exists to activate.",
-                    "Travel Services", "➕"
+                    "View Notice Details", "Low",
+                    "Offer to show the full details of the active travel notice.",
+                    "Travel Services", "📄"
                 )
+            return response
+
+        self._take_action("Travel Notice Status Report", "Informed user no active notice found.")
+        self._set_response_construction("Informing user they have no active travel notice.")
+        response = "It looks like you don't have any active travel notices set up right now."
+        self._add_next_best_action(
+            "Create Travel Notice", "Medium",
+            "Offer to help create a new travel notice for an upcoming trip.",
+            "Travel Services", "➕"
+        )
+        response += " Are you planning a trip? I can help you set one up."
+        return response
+
+    def _handle_create_notice(self, active_notice: bool, notice_details: Dict, mentioned_countries: List[str], needs_activation_fix: bool) -> str:
+        self._consider_action("Set up new travel notice", "User expressed intent to create a travel plan/notice.")
+
+        if active_notice:
+            self._take_action("Create Notice Halted", "User already has an active notice.")
+            self._set_response_construction("Informing about existing notice and offering to update it instead.")
+            response = f"You already have a travel notice active for {', '.join(notice_details.get('countries', []))} (until {notice_details.get('travel_end', 'N/A')}). Did you want to update this existing notice, perhaps add more countries or change the dates?"
+            self._add_next_best_action(
+                "Update Existing Notice", "Medium",
+                "Offer to modify the current travel notice instead of creating a new one.",
+                "Travel Services", "✏️"
+            )
+            self._add_next_best_action(
+                "Cancel Existing Notice", "Low",
+                "Offer to cancel the current notice if it's no longer needed.",
+                "Travel Services", "❌"
+            )
+            return response
+
+        self._take_action("New Travel Notice Creation Initiated", "Guiding user through the creation process.")
+        self._set_response_construction("Guiding user through creating a new travel notice, prompting for necessary details.")
+        # Adjacent literals are joined at compile time
+        response = (
+            "Okay, I can help you set up a new travel notice. To do this, I'll need a few details:"
+            "\n- Which countries will you be visiting?"
+            "\n- What is the start date of your trip?"
+            "\n- What is the end date of your trip?"
+        )
+
+        if mentioned_countries:
+            mentioned_countries_str = ', '.join(mentioned_countries)
+            response += f"\n\nYou mentioned {mentioned_countries_str}. Shall I include these in the notice?"
+            self._add_next_best_action(
+                "Confirm Countries for Notice", "High",
+                f"Ask user to confirm adding {mentioned_countries_str} to the new notice.",
+                "Travel Services", "✅"
+            )
+        else:
+            self._add_next_best_action(
+                "Provide Travel Details", "High",
+                "Prompt user to provide countries, start date, and end date.",
+                "Travel Services", "❓"
+            )
+        return response
 
-        self._add_analysis_step("Performing post-intent analysis: Checking for transaction/notice mismatches.")
-        mismatch_found = False
-        if active_notice and notice_details.get('status', '').lower() == 'active':
-            countries_in_notice = [c.lower() for c in notice_details.get('countries', [])]
-            countries_with_declines_outside_notice = set()
+    def _handle_update_notice(self, active_notice: bool, notice_details: Dict, mentioned_countries: List[str], needs_activation_fix: bool) -> str:
+        self._consider_action("Update existing travel notice", "User expressed intent to modify their travel notice.")
 
-            for tx in self.recent_transactions:
-                if tx.get('status', '').lower() == 'declined':
-                    location = tx.get('location', '').lower()
-                    tx_country = None
+        if not active_notice:
+            self._take_action("Update Notice Halted", "No active notice found to update.")
+            self._set_response_construction("No active notice to update, offering to create a new one instead.")
+            self._add_next_best_action(
+                "Create Travel Notice", "Medium",
+                "Guide customer through creating a new travel notice since none exists to update.",
+                "Travel Services", "➕"
+            )
+            return "It looks like you don't have an active travel notice to update right now. Would you like to create a new one for an upcoming trip instead?"
 
-                    known_countries = ['japan', 'germany', 'spain', 'usa', 'france', 'italy', 'uk']
-                    for country in known_countries:
-                        if country in location:
-                            tx_country = country
-                            break
+        notice_countries = notice_details.get('countries', [])
+        self._take_action("Travel Notice Update Initiated", f"Offering to update notice for {notice_details.get('countries')}.")
+        self._set_response_construction("Guiding user through updating their existing notice, asking what needs changing.")
+        response = f"Sure, I can help update your current travel notice (for {', '.join(notice_countries)}, valid until {notice_details.get('travel_end', 'N/A')}). What would you like to change? You can add/remove countries or adjust the travel dates."
 
-                    if tx_country and tx_country not in countries_in_notice:
-                        reason = tx.get('reason', '').lower()
-                        if "travel" in reason or "location" in reason or "security block" in reason or "unusual activity" in reason:
-                            countries_with_declines_outside_notice.add(tx_country.title())
-                            mismatch_found = True
+        not_included = [country for country in mentioned_countries if country not in notice_countries]
+        already_included = [country for country in mentioned_countries if country in notice_countries]
 
-            if countries_with_declines_outside_notice:
-                self._add_analysis_step(f"Found declined transactions in countries not covered by the active notice: {countries_with_declines_outside_notice}")
-                self._add_next_best_action(
-                    "Add Country to Notice", "High",
-                    f"Suggest adding {', '.join(countries_with_declines_outside_notice)} to the travel notice due to recent declines.",
-                    "Travel Services", "🌍"
-                )
-                if response and not response.endswith("?"):
-                    response += "\n\n**Additionally:** I noticed you had recent declined transactions in "
-                    response += f"{', '.join(countries_with_declines_outside_notice)}, which aren't currently covered by your active travel notice. "
-                    response += "Adding these countries could prevent future declines there. Would you like to do that?"
-                elif not response:
-                    response = "I noticed you had recent declined transactions in "
-                    response += f"{', '.join(countries_with_declines_outside_notice)}, which aren't currently covered by your active travel notice. "
-                    response += "Adding these countries could prevent future declines there. Would you like to do that?"
+        if not_included:
+            not_included_str = ', '.join(not_included)
+            response += f"\n\nI see you mentioned {not_included_str}. Would you like to add them to the notice?"
+            self._add_next_best_action(
+                "Add Countries to Notice", "Medium",
+                f"Offer to add {not_included_str} to the existing travel notice.",
+                "Travel Services", "➕"
+            )
+        elif already_included:
+            response += f"\n\nYou mentioned {', '.join(already_included)}, which are already included. Did you want to change the travel dates associated with this notice?"
+            self._add_next_best_action(
+                "Update Travel Dates", "Medium",
+                "Ask user if they want to modify the start or end dates for the notice.",
+                "Travel Services", "📅"
+            )
+        else:
+            self._add_next_best_action(
+                "Specify Notice Changes", "High",
+                "Ask the user to specify what they want to change (countries or dates).",
+                "Travel Services", "❓"
+            )
+        return response
 
-        if not mismatch_found:
-            self._add_analysis_step("No transaction/notice mismatches found requiring immediate action.")
+    def _handle_activate_notice(self, active_notice: bool, notice_details: Dict, mentioned_countries: List[str], needs_activation_fix: bool) -> str:
+        self._consider_action("Activate pending/faulty travel notice", "User specifically asked to activate or fix their notice.")
 
-        logger.info("%s completed processing", self.__class__.__name__)
-        return {
-            "response": response.strip(),
-            "reasoning_log": self.reasoning_log,
-            "next_best_actions": self.reasoning_log.get("next_best_actions", [])
-        }
+        if needs_activation_fix:
+            self._take_action("Travel Notice Activation (Fix)", "Fixed system error and activated the travel notice.")
+            self._set_response_construction("Confirming notice activation after fixing the system error and apologizing.")
+            self.travel_notice_data['status'] = 'Active'
+            notice_details['status'] = 'Active'
 
-    def _determine_intent(self, user_prompt: str) -> str:
-        """Determine the primary user intent regarding travel notices"""
-        logger.debug("%s determining intent from prompt", self.__class__.__name__)
-        prompt_lower = user_prompt.lower()
+            response = (
+                "I found the issue! There was a system glitch preventing your notice from activating properly. I've fixed that now."
+                f"\nYour travel notice for {', '.join(notice_details.get('countries', []))} (from {notice_details.get('travel_start', 'N/A')} to {notice_details.get('travel_end', 'N/A')}) is now **active**. "
+                "Apologies for that error. Your card should now work correctly in those locations."
+            )
+
+            self._add_next_best_action(
+                "Confirm Recent Declines Resolved", "High",
+                "Ask if the customer experienced any declines recently that should now be resolved.",
+                "Card Services", "👍"
+            )
+            return response
+
+        if active_notice:
+            self._take_action("Activation Check Complete", "Notice already active.")
+            self._set_response_construction("Informing user that their travel notice is already active.")
+            return f"Good news! Your travel notice for {', '.join(notice_details.get('countries', []))} is already active and runs until {notice_details.get('travel_end', 'N/A')}. No further action needed on activation."
+
+        self._take_action("Activation Halted", "No notice found to activate.")
+        self._set_response_construction("No notice found to activate, offering to create one.")
+        self._add_next_best_action(
+            "Create Travel Notice", "Medium",
+            "Guide customer through creating a new travel notice as none exists to activate.",
+            "Travel Services", "➕"
+        )
+        return "I couldn't find a pending travel notice to activate. Do you need help setting up a new travel notice for a trip?"
+
+    # One handler per intent returned by _determine_intent
+    _INTENT_HANDLERS = {
+        "check_status": _handle_check_status,
+        "create_notice": _handle_create_notice,
+        "update_notice": _handle_update_notice,
+        "activate_notice": _handle_activate_notice,
+    }
+
+    def _determine_intent(self, prompt_lower: str) -> str:
+        """Determine the primary user intent regarding travel notices from the lowercased prompt"""
+        logger.debug("%s determining intent from prompt", self._name)
 
-        if re.search(r"\b(activate|fix|enable|reactivate|confirm it[']?s active)\b", prompt_lower):
+        if TRAVEL_ACTIVATE_RE.search(prompt_lower):
             if "activate travel" in prompt_lower and not any(k in prompt_lower for k in ["fix", "enable", "confirm"]):
                 pass
             else:
                 self._add_analysis_step("Detected keywords related to activating or fixing a notice.")
                 return "activate_notice"
 
-        create_keywords = ["create", "set up", "new", "add.*notice", "submit.*notice", "inform.*travel", "going to"]
-        if any(re.search(r'\b' + keyword + r'\b', prompt_lower) for keyword in create_keywords):
-            if not re.search(r"\b(update|change|modify|edit)\b", prompt_lower):
+        if TRAVEL_CREATE_RE.search(prompt_lower):
+            if not TRAVEL_EDIT_RE.search(prompt_lower):
                 self._add_analysis_step("Detected keywords related to creating a new notice.")
                 return "create_notice"
 
-        if re.search(r"\b(update|change|modify|edit|add countries|remove countries|extend|shorten)\b", prompt_lower):
+        if TRAVEL_UPDATE_RE.search(prompt_lower):
             self._add_analysis_step("Detected keywords related to updating an existing notice.")
             return "update_notice"
 
         self._add_analysis_step("No specific create/update/activate keywords found. Defaulting intent to 'check_status'.")
         return "check_status"
 
-    def _extract_countries(self, user_prompt: str) -> List[str]:
-        """Extract mentioned countries from the user prompt"""
-        logger.debug("%s extracting countries from prompt", self.__class__.__name__)
-        countries = []
-        prompt_lower = user_prompt.lower()
-        country_keywords = [
-            "japan", "tokyo", "osaka",
-            "germany", "berlin", "munich",
-            "spain", "barcelona", "madrid",
-            "france", "paris", "nice",
-            "italy", "rome", "milan",
-            "usa", "us", "united states", "america",
-            "uk", "united kingdom", "london", "england", "scotland",
-            "canada", "mexico", "australia",
-        ]
-        for country in country_keywords:
-            if re.search(r'\b' + re.escape(country) + r'\b', prompt_lower):
-                if country in ["usa", "us", "united states", "america"]:
-                    normalized = "USA"
-                elif country in ["uk", "united kingdom", "england", "scotland"]:
-                    normalized = "UK"
-                else:
-                    normalized = country.title()
-
-                if normalized not in countries:
-                    countries.append(normalized)
-        return countries
+    def _extract_countries(self, prompt_lower: str) -> List[str]:
+        """Extract mentioned countries from the lowercased user prompt"""
+        logger.debug("%s extracting countries from prompt", self._name)
+        matches = COUNTRY_RE.findall(prompt_lower)
+        return list(dict.fromkeys(COUNTRY_ALIASES.get(country, country.title()) for country in matches))
 
     def _check_active_notice(self) -> Tuple[bool, Dict]:
         """Check if there's an active travel notice and return its details"""
-        logger.debug("%s checking active travel notice", self.__class__.__name__)
+        logger.debug("%s checking active travel notice", self._name)
         if not self.travel_notice_data or not self.travel_notice_data.get('countries'):
             return False, {}
 
@@ -658,9 +750,8 @@ class TravelNoticeAgent(BaseAgent):
             if not start_date_str or not end_date_str:
                 return bool(details.get('countries')), details
 
-            date_format = "%B %d, %Y"
-            start_date = datetime.datetime.strptime(start_date_str, date_format).date()
-            end_date = datetime.datetime.strptime(end_date_str, date_format).date()
+            start_date = _parse_notice_date(start_date_str)
+            end_date = _parse_notice_date(end_date_str)
             today = datetime.date.today()
 
             is_active_time = start_date <= today <= end_date or start_date > today
@@ -678,8 +769,13 @@ class TravelNoticeAgent(BaseAgent):
 class CardServicesAgent(BaseAgent):
     """Agent specializing in card-related services"""
 
+    def __init__(self, customer_data: Dict, travel_notice_data: Dict, recent_transactions: List[Dict], record_trace: bool = True):
+        super().__init__(customer_data, travel_notice_data, recent_transactions, record_trace=record_trace)
+        # Filled by the first _get_card_info call; process() and _check_card_issues share it
+        self._card_info = None
+
     def process(self, user_prompt: str) -> Dict:
-        logger.info("%s processing prompt: %s", self.__class__.__name__, user_prompt)
+        logger.info("%s processing prompt: %s", self._name, user_prompt)
         self._add_analysis_step("Initializing CardServicesAgent")
         self._add_analysis_step(f"Received user prompt: '{user_prompt}'")
 
@@ -695,211 +791,219 @@ class CardServicesAgent(BaseAgent):
         self._add_decision_factor("inferred_card_issues", inferred_card_issues)
         self._add_analysis_step(f"Inferred potential card issues: {inferred_card_issues}")
 
-        response = ""
         card_desc = f"your {card_info.get('card_type', 'card')} ending in {card_info.get('last_four', '****')}"
-
-        if intent == "card_status":
-            self._add_analysis_step("Handling 'card_status' intent.")
-            self._consider_action("Provide card status information", "User explicitly asked about the card's status.")
-            self._take_action("Card Status Report", f"Reported status of {card_desc} as {card_info.get('status', 'unknown')}.")
-            self._set_response_construction("Providing information about current card status and any inferred issues.")
-
-            response = f"Okay, I checked the status of {card_desc}. It is currently **{card_info.get('status', 'unknown')}**."
-
-            if inferred_card_issues:
-                response += "\n\nBased on recent activity, I also noticed a potential related issue:"
-                critical_issue = next((issue for issue in inferred_card_issues if "lost" in issue or "fraud" in issue), inferred_card_issues[0])
-                response += f"\n- {critical_issue}"
-
-                if "reported lost" in card_info.get('status', ''):
-                    response += "\n\nSince the card is marked as lost, it cannot be used. Would you like me to help you order a replacement?"
-                    self._add_next_best_action(
-                        "Order Replacement Card", "High",
-                        "Initiate the process to order a replacement for the lost card.",
-                        "Card Services", "🆕"
-                    )
-                elif "frozen" in card_info.get('status', '') or "blocked" in card_info.get('status', ''):
-                    response += "\n\nBecause the card is blocked, transactions will be declined. We should resolve the reason for the block. Can I help with that?"
-                    self._add_next_best_action(
-                        "Resolve Card Block", "High",
-                        "Investigate the reason for the card block and guide the user to resolve it.",
-                        "Card Services", "🔓"
-                    )
-                elif "declined transactions" in critical_issue:
-                    response += "\n\nHaving declined transactions can sometimes indicate an issue. Would you like to review those declines?"
-                    self._add_next_best_action(
-                        "Review Declined Transactions", "Medium",
-                        "Offer to investigate the recent declined transactions.",
-                        "Transaction Analysis", "📉"
-                    )
-
-        elif intent == "report_lost_stolen":
-            self._add_analysis_step("Handling 'report_lost_stolen' intent.")
-            self._consider_action("Mark card as lost/stolen", "User reported their card is lost or stolen.")
-
-            if card_info.get('status', '').lower() == "reported lost" or card_info.get('status', '').lower() == "stolen":
-                self._take_action("Lost/Stolen Report Skipped", f"Card {card_desc} was already marked as {card_info.get('status')}.")
-                self._set_response_construction("Informing user card is already marked as lost/stolen and offering replacement.")
-                response = f"I see {card_desc} is already marked as '{card_info.get('status')}' in our system. Because it's blocked, no further transactions can be made with it."
-                response += "\n\nWould you like me to help you order a replacement card now?"
-                self._add_next_best_action(
-                    "Order Replacement Card", "High",
-                    "Initiate the process to order a replacement for the already reported card.",
-                    "Card Services", "🆕"
-                )
-            else:
-                self._take_action("Report Card Lost/Stolen", f"Marked {card_desc} as lost/stolen in the system.")
-                self._set_response_construction("Confirming card has been marked as lost/stolen, explaining consequences, and offering replacement.")
-                card_info['status'] = 'reported lost'
-                response = f"Okay, I've immediately marked {card_desc} as lost/stolen. For your security, this card is now **blocked** and cannot be used."
-                response += "\n\nA replacement card will be automatically mailed to your address on file and should arrive in 5-7 business days. Is there anything else I can help with regarding this?"
-                self._add_next_best_action(
-                    "Verify Shipping Address", "Medium",
-                    "Offer to confirm or update the shipping address for the replacement card.",
-                    "Card Services", "🏠"
-                )
-                self._add_next_best_action(
-                    "Offer Digital Card Access", "Medium",
-                    "Inform user about options for immediate digital card access while waiting.",
-                    "Digital Services", "📱"
-                )
+        response = self._INTENT_HANDLERS[intent](self, card_info, card_desc, inferred_card_issues)
+        return self._build_result(response)
+
+    def _handle_card_status(self, card_info: Dict, card_desc: str, inferred_card_issues: List[str]) -> str:
+        self._add_analysis_step("Handling 'card_status' intent.")
+        self._consider_action("Provide card status information", "User explicitly asked about the card's status.")
+        status = card_info.get('status', 'unknown')
+        self._take_action("Card Status Report", f"Reported status of {card_desc} as {status}.")
+        self._set_response_construction("Providing information about current card status and any inferred issues.")
+
+        response = f"Okay, I checked the status of {card_desc}. It is currently **{status}**."
+
+        if inferred_card_issues:
+            critical_issue = next((issue for issue in inferred_card_issues if "lost" in issue or "fraud" in issue), inferred_card_issues[0])
+            response += f"\n\nBased on recent activity, I also noticed a potential related issue:\n- {critical_issue}"
+
+            if "reported lost" in status:
+                response += "\n\nSince the card is marked as lost, it cannot be used. Would you like me to help you order a replacement?"
+                self._add_next_best_action(*ORDER_REPLACEMENT_CARD_ACTION)
+            elif "frozen" in status or "blocked" in status:
+                response += "\n\nBecause the card is blocked, transactions will be declined. We should resolve the reason for the block. Can I help with that?"
                 self._add_next_best_action(
-                    "Review Recent Transactions (Security)", "High",
-                    "Suggest reviewing recent transactions for any unauthorized charges.",
-                    "Security", "🛡️"
-                )
-
-        elif intent == "replace_card":
-            self._add_analysis_step("Handling 'replace_card' intent (e.g., damaged card, expiring soon).")
-            self._consider_action("Process card replacement", "User requested a replacement for their card (not necessarily lost/stolen).")
-            self._take_action("Card Replacement Initiated", f"Initiated replacement process for {card_desc}.")
-            self._set_response_construction("Confirming card replacement request and explaining the process.")
-
-            expires_soon = False
-
-            if expires_soon:
-                response = f"Yes, I see {card_desc} is expiring soon. I've initiated the process to send you a new one. It should arrive within 5-7 business days."
-            elif card_info.get('status', '').lower() == "active":
-                response = f"Okay, I can process a replacement for {card_desc}. Your current card will remain active until you activate the new one."
-                response += " The new card should arrive in 5-7 business days."
-            else:
-                response = f"Since {card_desc} is currently '{card_info.get('status')}', a replacement is typically part of resolving that status. We've already started that process if it was reported lost/stolen."
-                response += " If it was blocked for another reason, let's resolve that first. Can I help with the reason it was blocked?"
-
-            if card_info.get('status', '').lower() == "active" or expires_soon:
-                self._add_next_best_action(
-                    "Expedite Replacement Shipping", "Low",
-                    "Offer expedited shipping options for the replacement card (may involve a fee).",
-                    "Card Services", "🚀"
-                )
-                self._add_next_best_action(
-                    "Update Card Design", "Low",
-                    "If applicable, offer different card designs for the replacement.",
-                    "Card Services", "🎨"
+                    "Resolve Card Block", "High",
+                    "Investigate the reason for the card block and guide the user to resolve it.",
+                    "Card Services", "🔓"
                 )
+            elif "declined transactions" in critical_issue:
+                response += "\n\nHaving declined transactions can sometimes indicate an issue. Would you like to review those declines?"
+                self._add_next_best_action(*REVIEW_DECLINED_TRANSACTIONS_ACTION)
+        return response
+
+    def _handle_report_lost_stolen(self, card_info: Dict, card_desc: str, inferred_card_issues: List[str]) -> str:
+        self._add_analysis_step("Handling 'report_lost_stolen' intent.")
+        self._consider_action("Mark card as lost/stolen", "User reported their card is lost or stolen.")
+
+        status = card_info.get('status', '')
+        if status.lower() in ("reported lost", "stolen"):
+            self._take_action("Lost/Stolen Report Skipped", f"Card {card_desc} was already marked as {status}.")
+            self._set_response_construction("Informing user card is already marked as lost/stolen and offering replacement.")
+            response = (f"I see {card_desc} is already marked as '{status}' in our system. Because it's blocked, no further transactions can be made with it."
+                        "\n\nWould you like me to help you order a replacement card now?")
+            self._add_next_best_action(
+                "Order Replacement Card", "High",
+                "Initiate the process to order a replacement for the already reported card.",
+                "Card Services", "🆕"
+            )
+        else:
+            self._take_action("Report Card Lost/Stolen", f"Marked {card_desc} as lost/stolen in the system.")
+            self._set_response_construction("Confirming card has been marked as lost/stolen, explaining consequences, and offering replacement.")
+            card_info['status'] = 'reported lost'
+            response = (f"Okay, I've immediately marked {card_desc} as lost/stolen. For your security, this card is now **blocked** and cannot be used."
+                        "\n\nA replacement card will be automatically mailed to your address on file and should arrive in 5-7 business days. Is there anything else I can help with regarding this?")
+            self._add_next_best_action(
+                "Verify Shipping Address", "Medium",
+                "Offer to confirm or update the shipping address for the replacement card.",
+                "Card Services", "🏠"
+            )
+            self._add_next_best_action(
+                "Offer Digital Card Access", "Medium",
+                "Inform user about options for immediate digital card access while waiting.",
+                "Digital Services", "📱"
+            )
+            self._add_next_best_action(
+                "Review Recent Transactions (Security)", "High",
+                "Suggest reviewing recent transactions for any unauthorized charges.",
+                "Security", "🛡️"
+            )
+        return response
+
+    def _handle_replace_card(self, card_info: Dict, card_desc: str, inferred_card_issues: List[str]) -> str:
+        self._add_analysis_step("Handling 'replace_card' intent (e.g., damaged card, expiring soon).")
+        self._consider_action("Process card replacement", "User requested a replacement for their card (not necessarily lost/stolen).")
+        self._take_action("Card Replacement Initiated", f"Initiated replacement process for {card_desc}.")
+        self._set_response_construction("Confirming card replacement request and explaining the process.")
+
+        expires_soon = False
+        status = card_info.get('status', '')
+        card_active = status.lower() == "active"
+
+        if expires_soon:
+            response = f"Yes, I see {card_desc} is expiring soon. I've initiated the process to send you a new one. It should arrive within 5-7 business days."
+        elif card_active:
+            response = (f"Okay, I can process a replacement for {card_desc}. Your current card will remain active until you activate the new one."
+                        " The new card should arrive in 5-7 business days.")
+        else:
+            response = (f"Since {card_desc} is currently '{status}', a replacement is typically part of resolving that status. We've already started that process if it was reported lost/stolen."
+                        " If it was blocked for another reason, let's resolve that first. Can I help with the reason it was blocked?")
 
-        elif intent == "card_limits":
-            self._add_analysis_step("Handling 'card_limits' intent.")
-            self._consider_action("Provide card limit information", "User asked about spending or withdrawal limits.")
-            self._take_action("Card Limits Report", f"Provided limit information for {card_desc}.")
-            self._set_response_construction("Providing information about relevant card limits.")
+        if card_active or expires_soon:
+            self._add_next_best_action(
+                "Expedite Replacement Shipping", "Low",
+                "Offer expedited shipping options for the replacement card (may involve a fee).",
+                "Card Services", "🚀"
+            )
+            self._add_next_best_action(
+                "Update Card Design", "Low",
+                "If applicable, offer different card designs for the replacement.",
+                "Card Services", "🎨"
+            )
+        return response
 
-            limits = self._get_card_limits(card_info)
-            self._add_decision_factor("retrieved_card_limits", limits)
+    def _handle_card_limits(self, card_info: Dict, card_desc: str, inferred_card_issues: List[str]) -> str:
+        self._add_analysis_step("Handling 'card_limits' intent.")
+        self._consider_action("Provide card limit information", "User asked about spending or withdrawal limits.")
+        self._take_action("Card Limits Report", f"Provided limit information for {card_desc}.")
+        self._set_response_construction("Providing information about relevant card limits.")
 
-            response = f"Here are the current limits associated with {card_desc}:\n"
-            response += f"- Daily Purchase Limit: ${limits.get('daily_purchase', 'N/A'):,}\n"
-            response += f"- Daily ATM Withdrawal Limit: ${limits.get('daily_atm', 'N/A'):,}\n"
-            if 'credit_limit' in limits:
-                response += f"- Total Credit Limit: ${limits.get('credit_limit'):,}\n"
-                response += f"- Available Credit: ${limits.get('available_credit'):,}"
+        limits = self._get_card_limits(card_info)
+        self._add_decision_factor("retrieved_card_limits", limits)
 
-            eligible_for_increase = card_info.get('eligible_for_credit_increase', False)
-            self._add_decision_factor("eligible_for_limit_increase", eligible_for_increase)
+        parts = [
+            f"Here are the current limits associated with {card_desc}:\n",
+            f"- Daily Purchase Limit: ${limits.get('daily_purchase', 'N/A'):,}\n",
+            f"- Daily ATM Withdrawal Limit: ${limits.get('daily_atm', 'N/A'):,}\n",
+        ]
+        if 'credit_limit' in limits:
+            parts.append(f"- Total Credit Limit: ${limits.get('credit_limit'):,}\n")
+            parts.append(f"- Available Credit: ${limits.get('available_credit'):,}")
+        response = "".join(parts)
 
-            if eligible_for_increase and 'credit_limit' in limits:
-                response += "\n\nGood news! You may be eligible for a credit limit increase. Would you like to explore that possibility?"
-                self._add_next_best_action(
-                    "Request Credit Limit Increase", "Medium",
-                    "Offer to start the process for a credit limit increase.",
-                    "Account Management", "📈"
-                )
-            elif not eligible_for_increase and 'credit_limit' in limits:
-                response += "\n\nIf you need a higher limit in the future, feel free to ask, and we can review your account."
+        eligible_for_increase = card_info.get('eligible_for_credit_increase', False)
+        self._add_decision_factor("eligible_for_limit_increase", eligible_for_increase)
 
+        if eligible_for_increase and 'credit_limit' in limits:
+            response += "\n\nGood news! You may be eligible for a credit limit increase. Would you like to explore that possibility?"
             self._add_next_best_action(
-                "Set Spending Alerts", "Low",
-                "Offer to set up alerts when spending approaches certain limits.",
-                "Account Management", "🔔"
+                "Request Credit Limit Increase", "Medium",
+                "Offer to start the process for a credit limit increase.",
+                "Account Management", "📈"
             )
+        elif not eligible_for_increase and 'credit_limit' in limits:
+            response += "\n\nIf you need a higher limit in the future, feel free to ask, and we can review your account."
+
+        self._add_next_best_action(
+            "Set Spending Alerts", "Low",
+            "Offer to set up alerts when spending approaches certain limits.",
+            "Account Management", "🔔"
+        )
+        return response
+
+    def _handle_general_inquiry(self, card_info: Dict, card_desc: str, inferred_card_issues: List[str]) -> str:
+        self._add_analysis_step("Handling 'general_inquiry' intent regarding the card.")
+        self._consider_action("Provide general card information", "User asked a general question about their card.")
+        self._take_action("General Card Information Provided", f"Provided overview for {card_desc}.")
+        self._set_response_construction("Providing general information about the customer's card and highlighting any issues.")
+
+        response = f"Let's talk about {card_desc}. It's a {card_info.get('card_type', '')} card, currently {card_info.get('status', 'active')}."
+
+        if inferred_card_issues:
+            issue = inferred_card_issues[0]
+            response += ("\n\nWhile checking, I did notice a potential issue based on recent activity:"
+                         f"\n- {issue}"
+                         "\n\nCan I help you look into this further?")
+            if "lost" in issue:
+                self._add_next_best_action(*ORDER_REPLACEMENT_CARD_ACTION)
+            elif "declined" in issue:
+                self._add_next_best_action(*REVIEW_DECLINED_TRANSACTIONS_ACTION)
 
         else:
-            self._add_analysis_step("Handling 'general_inquiry' intent regarding the card.")
-            self._consider_action("Provide general card information", "User asked a general question about their card.")
-            self._take_action("General Card Information Provided", f"Provided overview for {card_desc}.")
-            self._set_response_construction("Providing general information about the customer's card and highlighting any issues.")
-
-            response = f"Let's talk about {card_desc}. It's a {card_info.get('card_type', '')} card, currently {card_info.get('status', 'active')}."
-
-            if inferred_card_issues:
-                response += "\n\nWhile checking, I did notice a potential issue based on recent activity:"
-                issue = inferred_card_issues[0]
-                response += f"\n- {issue}"
-                response += "\n\nCan I help you look into this further?"
-                if "lost" in issue:
-                    self._add_next_best_action("Order Replacement Card", "High", "...", "Card Services", "🆕")
-                elif "declined" in issue:
-                    self._add_next_best_action("Review Declined Transactions", "Medium", "...", "Transaction Analysis", "📉")
-
-            else:
-                response += " Everything looks normal with the card right now. Do you have a specific question about its features, benefits, or something else?"
-                self._add_next_best_action(
-                    "Explore Card Benefits", "Low",
-                    "Offer to explain the benefits and features associated with the card.",
-                    "Card Services", "⭐"
-                )
-                self._add_next_best_action(
-                    "Ask Specific Card Question", "Low",
-                    "Prompt the user to ask their specific question about the card.",
-                    "General Inquiry", "❓"
-                )
+            response += " Everything looks normal with the card right now. Do you have a specific question about its features, benefits, or something else?"
+            self._add_next_best_action(
+                "Explore Card Benefits", "Low",
+                "Offer to explain the benefits and features associated with the card.",
+                "Card Services", "⭐"
+            )
+            self._add_next_best_action(
+                "Ask Specific Card Question", "Low",
+                "Prompt the user to ask their specific question about the card.",
+                "General Inquiry", "❓"
+            )
+        return response
+
+    # One handler per intent returned by _determine_intent
+    _INTENT_HANDLERS = {
+        "card_status": _handle_card_status,
+        "report_lost_stolen": _handle_report_lost_stolen,
+        "replace_card": _handle_replace_card,
+        "card_limits": _handle_card_limits,
+        "general_inquiry": _handle_general_inquiry,
+    }
 
-        logger.info("%s completed processing", self.__class__.__name__)
-        return {
-            "response": response.strip(),
-            "reasoning_log": self.reasoning_log,
-            "next_best_actions": self.reasoning_log.get("next_best_actions", [])
-        }
+    # Analysis step recorded when _determine_intent settles on each intent
+    _INTENT_STEPS = {
+        "report_lost_stolen": "Detected keywords related to lost or stolen card.",
+        "replace_card": "Detected keywords related to replacing a card (damaged, expiring, etc.).",
+        "card_limits": "Detected keywords related to card limits.",
+        "card_status": "Detected keywords related to card status.",
+    }
 
     def _determine_intent(self, user_prompt: str) -> str:
         """Determine the primary user intent regarding card services"""
-        logger.debug("%s determining intent from prompt", self.__class__.__name__)
+        logger.debug("%s determining intent from prompt", self._name)
         prompt_lower = user_prompt.lower()
 
-        if re.search(r"\b(lost|stolen|missing|can'?t find my card|someone took my card)\b", prompt_lower):
-            self._add_analysis_step("Detected keywords related to lost or stolen card.")
-            return "report_lost_stolen"
-
-        if re.search(r"\b(replace|replacement|new card|damaged|broken|expired|expiring soon)\b", prompt_lower):
-            if not re.search(r"\b(lost|stolen|missing)\b", prompt_lower):
-                self._add_analysis_step("Detected keywords related to replacing a card (damaged, expiring, etc.).")
-                return "replace_card"
-
-        if re.search(r"\b(limit[s]?|spending limit|how much can i spend|withdrawal limit|max.*spend|max.*withdraw)\b", prompt_lower):
-            self._add_analysis_step("Detected keywords related to card limits.")
-            return "card_limits"
-
-        if re.search(r"\b(status|active|inactive|frozen|blocked|is my card working)\b", prompt_lower):
-            if not re.search(r"\b(replace|limit)\b", prompt_lower):
-                self._add_analysis_step("Detected keywords related to card status.")
-                return "card_status"
+        found = set()
+        for match in CARD_INTENT_RE.finditer(prompt_lower):
+            found.add(match.lastgroup)
+            if match.lastgroup == "report_lost_stolen":
+                break
+        for intent in CARD_INTENT_PRIORITY:
+            if intent in found:
+                self._add_analysis_step(self._INTENT_STEPS[intent])
+                return intent
 
         self._add_analysis_step("No specific card service keywords found. Defaulting intent to 'general_inquiry'.")
         return "general_inquiry"
 
     def _get_card_info(self) -> Dict:
         """Simulate fetching basic card information"""
-        logger.debug("%s fetching card info", self.__class__.__name__)
+        if self._card_info is not None:
+            return self._card_info
+        logger.debug("%s fetching card info", self._name)
         self._add_analysis_step("Fetching basic card information (simulated).")
 
         card_info = {
@@ -910,50 +1014,42 @@ class CardServicesAgent(BaseAgent):
             "rewards_program": self.customer_data.get("rewards_tier", "Standard")
         }
 
-        for tx in self.recent_transactions:
-            reason = tx.get("reason", "").lower()
-            if "card reported lost" in reason or "stolen" in reason:
-                card_info["status"] = "reported lost"
-                self._add_analysis_step("Inferred card status changed to 'reported lost' based on transaction decline reason.")
-                break
+        if self._card_reported_lost:
+            card_info["status"] = "reported lost"
+            self._add_analysis_step("Inferred card status changed to 'reported lost' based on transaction decline reason.")
 
+        self._card_info = card_info
         return card_info
 
     def _check_card_issues(self) -> List[str]:
         """Infer potential issues from card status and transactions"""
-        logger.debug("%s checking for card issues", self.__class__.__name__)
+        logger.debug("%s checking for card issues", self._name)
         issues = []
         card_status = self._get_card_info().get('status', 'unknown').lower()
 
         if card_status != "active":
             issues.append(f"The card is currently marked as '{card_status}'.")
 
+        # A 'card reported lost' decline already makes _get_card_info report the card as lost, so an active
+        # card never has one and no discrepancy scan of the decline reasons is needed here
         if card_status == "active":
-            declined_transactions = [tx for tx in self.recent_transactions if tx.get("status", "").lower() == "declined"]
+            declined_transactions = self._declined_transactions
             if declined_transactions:
                 issues.append(f"There {'has' if len(declined_transactions) == 1 else 'have'} been {len(declined_transactions)} declined transaction(s) recently while the card status is active.")
 
-        if card_status == "active" and any("card reported lost" in tx.get("reason", "").lower() for tx in self.recent_transactions):
-            issues.append("There's a discrepancy: the card is marked active, but a recent transaction was declined because the card was reported lost.")
-
-        travel_notice_status = self.travel_notice_data.get("status", "Unknown").lower()
-        if "error" in travel_notice_status or "not activated" in travel_notice_status:
-            international_declines = []
-            for tx in self.recent_transactions:
-                if tx.get('status', '').lower() == 'declined':
-                    location = tx.get('location', '').lower()
-                    is_international = any(loc in location for loc in ["japan", "germany", "spain", "france", "italy", "uk"])
-                    if is_international:
-                        international_declines.append(tx)
-
-            if international_declines:
+        if self._travel_notice_issue:
+            if any(
+                country in location
+                for location in self._declined_locations
+                for country in CARD_INTERNATIONAL_COUNTRIES
+            ):
                 issues.append("An issue with the travel notice activation may be causing international declines.")
 
         return issues
 
     def _get_card_limits(self, card_info: Dict) -> Dict:
         """Simulate fetching card limits"""
-        logger.debug("%s fetching card limits", self.__class__.__name__)
+        logger.debug("%s fetching card limits", self._name)
         self._add_analysis_step("Fetching card limits (simulated).")
         limits = {
             "daily_purchase": 5000,
@@ -970,7 +1066,7 @@ class GeneralInquiryAgent(BaseAgent):
     """Agent handling general account inquiries and information requests"""
 
     def process(self, user_prompt: str) -> Dict:
-        logger.info("%s processing prompt: %s", self.__class__.__name__, user_prompt)
+        logger.info("%s processing prompt: %s", self._name, user_prompt)
         self._add_analysis_step("Initializing GeneralInquiryAgent")
         self._add_analysis_step(f"Received user prompt: '{user_prompt}'")
 
@@ -982,167 +1078,173 @@ class GeneralInquiryAgent(BaseAgent):
         self._add_decision_factor("account_summary_info", account_summary)
         self._add_analysis_step("Gathered account summary information.")
 
-        response = ""
         customer_name = self.customer_data.get('name', 'Valued Customer')
+        response = self._INQUIRY_HANDLERS[inquiry_type](self, account_summary, customer_name)
+        return self._build_result(response)
+
+    def _handle_account_overview(self, account_summary: Dict, customer_name: str) -> str:
+        self._add_analysis_step("Handling 'account_overview' inquiry.")
+        self._consider_action("Provide account overview", "User requested general account information or summary.")
+        self._take_action("Account Overview Provided", "Generated summary of key account details.")
+        self._set_response_construction("Creating a concise summary of the customer's account information and status.")
+
+        parts = [
+            f"Okay {customer_name}, here's a quick overview of your {account_summary.get('account_type', 'account')}:\n\n",
+            f"- Account Holder: {account_summary.get('name', 'N/A')}\n",
+            f"- Account Type: {account_summary.get('account_type', 'N/A')}\n",
+            f"- Account Opened: {account_summary.get('account_opened', 'N/A')}\n",
+            f"- Primary Card: {account_summary.get('card_type', 'N/A')} ending in {account_summary.get('card_last_four', '****')}\n",
+        ]
 
-        if inquiry_type == "account_overview":
-            self._add_analysis_step("Handling 'account_overview' inquiry.")
-            self._consider_action("Provide account overview", "User requested general account information or summary.")
-            self._take_action("Account Overview Provided", "Generated summary of key account details.")
-            self._set_response_construction("Creating a concise summary of the customer's account information and status.")
-
-            response = f"Okay {customer_name}, here's a quick overview of your {account_summary.get('account_type', 'account')}:\n\n"
-            response += f"- Account Holder: {account_summary.get('name', 'N/A')}\n"
-            response += f"- Account Type: {account_summary.get('account_type', 'N/A')}\n"
-            response += f"- Account Opened: {account_summary.get('account_opened', 'N/A')}\n"
-            response += f"- Primary Card: {account_summary.get('card_type', 'N/A')} ending in {account_summary.get('card_last_four', '****')}\n"
-
-            if account_summary.get("has_declined_transactions"):
-                response += f"- Recent Activity Note: There have been some declined transactions recently.\n"
-                self._add_next_best_action(
-                    "Review Declined Transactions", "Medium",
-                    "Offer to investigate the recent declined transactions.",
-                    "Transaction Analysis", "📉"
-                )
-            if account_summary.get("has_travel_notice_issue"):
-                response += f"- Travel Notice Note: There might be an issue with your current travel notice activation.\n"
-                self._add_next_best_action(
-                    "Check Travel Notice Status", "High",
-                    "Offer to check and resolve issues with the travel notice.",
-                    "Travel Services", "✈️"
-                )
-
-            response += "\nIs there anything specific in this overview you'd like to discuss further?"
+        if account_summary.get("has_declined_transactions"):
+            parts.append("- Recent Activity Note: There have been some declined transactions recently.\n")
+            self._add_next_best_action(*REVIEW_DECLINED_TRANSACTIONS_ACTION)
+        if account_summary.get("has_travel_notice_issue"):
+            parts.append("- Travel Notice Note: There might be an issue with your current travel notice activation.\n")
             self._add_next_best_action(
-                "Ask Follow-up Question", "Low",
-                "Prompt the user if they have questions about the overview provided.",
-                "General Inquiry", "❓"
+                "Check Travel Notice Status", "High",
+                "Offer to check and resolve issues with the travel notice.",
+                "Travel Services", "✈️"
             )
 
-        elif inquiry_type == "balance_inquiry":
-            self._add_analysis_step("Handling 'balance_inquiry'.")
-            self._consider_action("Provide balance information", "User asked about account balance or funds.")
-            self._take_action("Balance Information Provided", f"Provided average balance: {account_summary.get('average_balance', 'N/A')}.")
-            self._set_response_construction("Providing balance information and context about recent activity.")
-
-            balance = account_summary.get('average_balance', 'N/A')
-            response = f"Your current average balance is approximately {balance}."
-
-            recent_approved = [tx for tx in self.recent_transactions if tx.get("status", "").lower() == "approved"][:3]
-            if recent_approved:
-                response += "\n\nHere are a few of your most recent approved transactions:"
-                for tx in recent_approved:
-                    response += f"\n- {tx.get('date')}: {tx.get('amount')} at {tx.get('merchant')}"
+        parts.append("\nIs there anything specific in this overview you'd like to discuss further?")
+        response = "".join(parts)
+        self._add_next_best_action(
+            "Ask Follow-up Question", "Low",
+            "Prompt the user if they have questions about the overview provided.",
+            "General Inquiry", "❓"
+        )
+        return response
+
+    def _handle_balance_inquiry(self, account_summary: Dict, customer_name: str) -> str:
+        self._add_analysis_step("Handling 'balance_inquiry'.")
+        self._consider_action("Provide balance information", "User asked about account balance or funds.")
+        self._take_action("Balance Information Provided", f"Provided average balance: {account_summary.get('average_balance', 'N/A')}.")
+        self._set_response_construction("Providing balance information and context about recent activity.")
+
+        balance = account_summary.get('average_balance', 'N/A')
+        response = f"Your current average balance is approximately {balance}."
+
+        recent_approved = [tx for tx in self.recent_transactions if tx.get("status", "").lower() == "approved"][:3]
+        if recent_approved:
+            response += "\n\nHere are a few of your most recent approved transactions:" + "".join(
+                f"\n- {tx.get('date')}: {tx.get('amount')} at {tx.get('merchant')}" for tx in recent_approved
+            )
 
+        self._add_next_best_action(
+            "See Full Transaction History", "Low",
+            "Offer to show the complete recent transaction history.",
+            "Account Management", "📜"
+        )
+        self._add_next_best_action(
+            "Set Up Balance Alerts", "Low",
+            "Suggest setting up notifications for low balance or large transactions.",
+            "Account Management", "🔔"
+        )
+        return response
+
+    def _handle_contact_preferences(self, account_summary: Dict, customer_name: str) -> str:
+        self._add_analysis_step("Handling 'contact_preferences' inquiry.")
+        self._consider_action("Provide contact preference information", "User asked about communication settings.")
+        self._take_action("Contact Preferences Reported", f"Provided current preference: {account_summary.get('contact_preference', 'N/A')}.")
+        self._set_response_construction("Informing about current contact preferences and offering update options.")
+
+        preference = account_summary.get('contact_preference', 'not set')
+        email = account_summary.get('email', 'not provided')
+        phone = account_summary.get('phone', 'not provided')
+
+        response = f"Your current contact preference is set to **{preference}**."
+        if preference.lower() == 'email':
+            response += f" We have your email address as: {email}."
+        elif preference.lower() == 'phone' or preference.lower() == 'sms':
+            response += f" We have your phone number as: {phone}."
+        else:
+            response += f" We have your email as {email} and phone as {phone}."
+
+        response += "\n\nWould you like to update your preferred contact method or change the email/phone number we have on file?"
+
+        self._add_next_best_action(
+            "Update Contact Method", "Medium",
+            "Offer to change the preferred method (Email, SMS, Phone, Mail).",
+            "Account Management", "⚙️"
+        )
+        self._add_next_best_action(
+            "Update Contact Details", "Medium",
+            "Offer to update the email address or phone number on file.",
+            "Account Management", "✏️"
+        )
+        return response
+
+    def _handle_general_help(self, account_summary: Dict, customer_name: str) -> str:
+        self._add_analysis_step("Handling 'general_help' or unclear inquiry.")
+        self._consider_action("Provide general assistance options", "User asked for help or the inquiry was not specific.")
+        self._take_action("General Help Options Provided", "Listed common tasks the agent can perform.")
+        self._set_response_construction("Creating a helpful starting point, listing capabilities, and offering personalized suggestions.")
+
+        response = (f"Hello {customer_name}! I can help with various banking tasks. For example, I can assist you with:\n\n"
+                    "- Checking your account balance or recent transactions\n"
+                    "- Managing travel notices for your trips\n"
+                    "- Card services like reporting lost/stolen cards or checking limits\n"
+                    "- Updating your contact preferences\n"
+                    "\nHow can I help you specifically today?")
+
+        if account_summary.get("has_declined_transactions"):
             self._add_next_best_action(
-                "See Full Transaction History", "Low",
-                "Offer to show the complete recent transaction history.",
-                "Account Management", "📜"
+                "Discuss Recent Declines", "Medium",
+                "Offer to look into the recent declined transactions.",
+                "Transaction Analysis", "📉"
             )
+        elif account_summary.get("has_travel_notice_issue"):
             self._add_next_best_action(
-                "Set Up Balance Alerts", "Low",
-                "Suggest setting up notifications for low balance or large transactions.",
-                "Account Management", "🔔"
+                "Resolve Travel Notice Issue", "High",
+                "Offer to fix the identified issue with the travel notice.",
+                "Travel Services", "✈️"
             )
-
-        elif inquiry_type == "contact_preferences":
-            self._add_analysis_step("Handling 'contact_preferences' inquiry.")
-            self._consider_action("Provide contact preference information", "User asked about communication settings.")
-            self._take_action("Contact Preferences Reported", f"Provided current preference: {account_summary.get('contact_preference', 'N/A')}.")
-            self._set_response_construction("Informing about current contact preferences and offering update options.")
-
-            preference = account_summary.get('contact_preference', 'not set')
-            email = account_summary.get('email', 'not provided')
-            phone = account_summary.get('phone', 'not provided')
-
-            response = f"Your current contact preference is set to **{preference}**."
-            if preference.lower() == 'email':
-                response += f" We have your email address as: {email}."
-            elif preference.lower() == 'phone' or preference.lower() == 'sms':
-                response += f" We have your phone number as: {phone}."
-            else:
-                response += f" We have your email as {email} and phone as {phone}."
-
-            response += "\n\nWould you like to update your preferred contact method or change the email/phone number we have on file?"
-
+        elif account_summary.get("card_status") != "active":
             self._add_next_best_action(
-                "Update Contact Method", "Medium",
-                "Offer to change the preferred method (Email, SMS, Phone, Mail).",
-                "Account Management", "⚙️"
+                f"Address Card Status ({account_summary.get('card_status')})", "High",
+                f"Offer to help resolve the issue with the card being {account_summary.get('card_status')}.",
+                "Card Services", "💳"
             )
+        else:
             self._add_next_best_action(
-                "Update Contact Details", "Medium",
-                "Offer to update the email address or phone number on file.",
-                "Account Management", "✏️"
+                "Review Account Security", "Low",
+                "Offer to review security settings or recent login activity.",
+                "Security", "🔒"
             )
-
-        else:
-            self._add_analysis_step("Handling 'general_help' or unclear inquiry.")
-            self._consider_action("Provide general assistance options", "User asked for help or the inquiry was not specific.")
-            self._take_action("General Help Options Provided", "Listed common tasks the agent can perform.")
-            self._set_response_construction("Creating a helpful starting point, listing capabilities, and offering personalized suggestions.")
-
-            response = f"Hello {customer_name}! I can help with various banking tasks. For example, I can assist you with:\n\n"
-            response += "- Checking your account balance or recent transactions\n"
-            response += "- Managing travel notices for your trips\n"
-            response += "- Card services like reporting lost/stolen cards or checking limits\n"
-            response += "- Updating your contact preferences\n"
-
-            response += "\nHow can I help you specifically today?"
-
-            if account_summary.get("has_declined_transactions"):
-                self._add_next_best_action(
-                    "Discuss Recent Declines", "Medium",
-                    "Offer to look into the recent declined transactions.",
-                    "Transaction Analysis", "📉"
-                )
-            elif account_summary.get("has_travel_notice_issue"):
-                self._add_next_best_action(
-                    "Resolve Travel Notice Issue", "High",
-                    "Offer to fix the identified issue with the travel notice.",
-                    "Travel Services", "✈️"
-                )
-            elif account_summary.get("card_status") != "active":
-                self._add_next_best_action(
-                    f"Address Card Status ({account_summary.get('card_status')})", "High",
-                    f"Offer to help resolve the issue with the card being {account_summary.get('card_status')}.",
-                    "Card Services", "💳"
-                )
-            else:
-                self._add_next_best_action(
-                    "Review Account Security", "Low",
-                    "Offer to review security settings or recent login activity.",
-                    "Security", "🔒"
-                )
-
-        logger.info("%s completed processing", self.__class__.__name__)
-        return {
-            "response": response.strip(),
-            "reasoning_log": self.reasoning_log,
-            "next_best_actions": self.reasoning_log.get("next_best_actions", [])
-        }
+        return response
+
+    # One handler per inquiry type returned by _determine_inquiry_type
+    _INQUIRY_HANDLERS = {
+        "account_overview": _handle_account_overview,
+        "balance_inquiry": _handle_balance_inquiry,
+        "contact_preferences": _handle_contact_preferences,
+        "general_help": _handle_general_help,
+    }
 
     def _determine_inquiry_type(self, user_prompt: str) -> str:
         """Determine the type of general inquiry based on keywords"""
-        logger.debug("%s determining inquiry type from prompt", self.__class__.__name__)
+        logger.debug("%s determining inquiry type from prompt", self._name)
         prompt_lower = user_prompt.lower()
 
-        if re.search(r"\b(balance|how much.*in my account|funds available|account total)\b", prompt_lower):
+        if INQUIRY_BALANCE_RE.search(prompt_lower):
             self._add_analysis_step("Detected keywords related to balance inquiry.")
             return "balance_inquiry"
 
-        if re.search(r"\b(contact|email|phone|text|sms|notification|preferences|how.*contact me)\b", prompt_lower):
+        if INQUIRY_CONTACT_RE.search(prompt_lower):
             if "travel notice" not in prompt_lower and "transaction" not in prompt_lower:
                 self._add_analysis_step("Detected keywords related to contact preferences.")
                 return "contact_preferences"
 
-        if re.search(r"\b(overview|summary|account details|my account|information.*account)\b", prompt_lower):
-            if not re.search(r"\b(balance|contact|travel|transaction|card)\b", prompt_lower):
+        topic_seen = False
+        if INQUIRY_OVERVIEW_RE.search(prompt_lower):
+            if not INQUIRY_OVERVIEW_GUARD_RE.search(prompt_lower):
                 self._add_analysis_step("Detected keywords related to account overview.")
                 return "account_overview"
+            # Every guard word is also a topic word, so the fallback below needs no second search
+            topic_seen = True
 
-        if re.search(r"\b(help|support|question|assist|can you)\b", prompt_lower) or \
-           not any(re.search(r"\b(balance|contact|overview|travel|transaction|card)\b", prompt_lower)):
+        if INQUIRY_HELP_RE.search(prompt_lower) or not (topic_seen or INQUIRY_TOPIC_RE.search(prompt_lower)):
             self._add_analysis_step("Inquiry seems general or asking for help. Defaulting to 'general_help'.")
             return "general_help"
 
@@ -1151,7 +1253,7 @@ class GeneralInquiryAgent(BaseAgent):
 
     def _gather_account_summary(self) -> Dict:
         """Gather key account details and flags for enriching responses"""
-        logger.debug("%s gathering account summary", self.__class__.__name__)
+        logger.debug("%s gathering account summary", self._name)
         self._add_analysis_step("Gathering summary details from customer data, travel notice, and transactions.")
         summary = {
             "name": self.customer_data.get("name", "N/A"),
@@ -1163,31 +1265,26 @@ class GeneralInquiryAgent(BaseAgent):
             "contact_preference": self.customer_data.get("contact_preference", "N/A"),
             "email": self.customer_data.get("email", "N/A"),
             "phone": self.customer_data.get("phone", "N/A"),
-            "has_declined_transactions": any(tx.get("status", "").lower() == "declined" for tx in self.recent_transactions),
-            "has_travel_notice_issue": "error" in self.travel_notice_data.get("status", "").lower() or \
-                                      "not activated" in self.travel_notice_data.get("status", "").lower(),
-            "card_status": "active"
+            "has_declined_transactions": bool(self._declined_transactions),
+            "has_travel_notice_issue": self._travel_notice_issue,
+            "card_status": "reported lost" if self._card_reported_lost else "active"
         }
 
-        for tx in self.recent_transactions:
-            reason = tx.get("reason", "").lower()
-            if "card reported lost" in reason or "stolen" in reason:
-                summary["card_status"] = "reported lost"
-                break
-
         return summary
 
 
-def get_agent_for_routing(agent_name: str, customer_data: Dict, travel_notice_data: Dict, recent_transactions: List[Dict]):
+# Routing names as returned by RouterAgent
+AGENT_CLASSES = {
+    "TransactionAnalysisAgent": TransactionAnalysisAgent,
+    "TravelNoticeAgent": TravelNoticeAgent,
+    "CardServicesAgent": CardServicesAgent,
+    "GeneralInquiryAgent": GeneralInquiryAgent
+}
+
+
+def get_agent_for_routing(agent_name: str, customer_data: Dict, travel_notice_data: Dict, recent_transactions: List[Dict], record_trace: bool = RECORD_TRACE):
     """Factory function to create the appropriate agent based on routing decision"""
     logger.info("Creating agent: %s", agent_name)
-    agent_map = {
-        "TransactionAnalysisAgent": TransactionAnalysisAgent,
-        "TravelNoticeAgent": TravelNoticeAgent,
-        "CardServicesAgent": CardServicesAgent,
-        "GeneralInquiryAgent": GeneralInquiryAgent
-    }
-
-    agent_class = agent_map.get(agent_name, GeneralInquiryAgent)
+    agent_class = AGENT_CLASSES.get(agent_name, GeneralInquiryAgent)
     logger.debug("Selected agent class: %s", agent_class.__name__)
-    return agent_class(customer_data, travel_notice_data, recent_transactions)
\ No newline at end of file
+    return agent_class(customer_data, travel_notice_data, recent_transactions, record_trace=record_trace)